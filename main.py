@@ -13,12 +13,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from prolog_builtins.registry import GLOBAL_REGISTRY, load_core_builtins
+# Solo core.constants (versión/defaults) a nivel de módulo: el resto del motor
+# se importa perezosamente dentro de main()/initialize_engine() para que
+# `--help` y `--version` no paguen la carga del parser, solver y builtins.
 from core.constants import DEFAULT_CONFIG
-from core.errors import LoadError, PrologError
-from prolog_io.loader import consult
-from prolog_io.repl import start
-from solver.engine import Engine
 
 
 def setup_argument_parser() -> argparse.ArgumentParser:
@@ -77,15 +75,19 @@ Comandos del REPL:
     return parser
 
 
-def initialize_engine(args: argparse.Namespace) -> Engine:
+def initialize_engine(args: argparse.Namespace) -> "Engine":
     """Inicializa el motor Prolog con la configuración especificada."""
-    
+    from prolog_builtins.registry import (
+        GLOBAL_REGISTRY,
+        load_arithmetic_builtins,
+        load_core_builtins,
+    )
+    from solver.engine import Engine
+
     engine = Engine(occurs_check=args.occurs_check)
-    
-    load_core_builtins(GLOBAL_REGISTRY)
-    
-    from prolog_builtins.registry import load_arithmetic_builtins
-    load_arithmetic_builtins(GLOBAL_REGISTRY)
+
+    load_core_builtins(GLOBAL_REGISTRY, occurs_check=engine.occurs_check)
+    load_arithmetic_builtins(GLOBAL_REGISTRY, occurs_check=engine.occurs_check)
     
     
     return engine
@@ -96,8 +98,12 @@ def main() -> None:
     
     parser = setup_argument_parser()
     args = parser.parse_args()
-    
+
     try:
+        from core.errors import LoadError, PrologError
+        from prolog_io.loader import consult
+        from prolog_io.repl import start
+
         engine = initialize_engine(args)
         
         if args.file:
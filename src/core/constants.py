@@ -6,7 +6,9 @@ Definimos valores por defecto, operadores predefinidos y configuración global.
 
 from __future__ import annotations
 
+from collections import ChainMap
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Dict, Tuple
 
 
@@ -34,33 +36,39 @@ class DefaultConfig:
 DEFAULT_CONFIG = DefaultConfig()
 
 
-# Predicados especiales reservados del sistema
-SPECIAL_PREDICATES = {
-    "true": 0,
-    "fail": 0,
-    "!": 0,  # cut
-    "=": 2,
-    "\\=": 2,
-    "==": 2,
-    "\\==": 2,
-    "is": 2,
-    "=:=": 2,
-    "=\\=": 2,
-    "<": 2,
-    "=<": 2,
-    ">": 2,
-    ">=": 2,
-}
+# Predicados especiales reservados del sistema.
+# frozenset de (nombre, aridad): el valor nunca se usaba, y la membresía en
+# un frozenset es más barata que en un dict.
+SPECIAL_PREDICATES = frozenset({
+    ("true", 0),
+    ("fail", 0),
+    ("!", 0),  # cut
+    ("=", 2),
+    ("\\=", 2),
+    ("==", 2),
+    ("\\==", 2),
+    ("is", 2),
+    ("=:=", 2),
+    ("=\\=", 2),
+    ("<", 2),
+    ("=<", 2),
+    (">", 2),
+    (">=", 2),
+})
 
 
 # Operadores predefinidos con precedencia y asociatividad
 # Formato: (precedencia, tipo, asociatividad)
 # tipo: 'fx' (prefix), 'fy' (prefix right-assoc), 'xf' (postfix), etc.
-PREDEFINED_OPERATORS = {
+#
+# Tablas separadas para binarios y unarios: el dict único anterior repetía
+# las claves "+" y "-" (binaria y unaria) y la segunda definición pisaba en
+# silencio a la primera. MappingProxyType las congela: solo lectura,
+# compartibles sin copiar.
+BINARY_OPS = MappingProxyType({
     ":-": (1200, "xfx", "none"),  # implicación (reglas)
     ";": (1100, "xfy", "right"),  # disyunción
     ",": (1000, "xfy", "right"),  # conjunción
-    "\\+": (900, "fy", "none"),   # negación
     "=": (700, "xfx", "none"),     # unificación
     "\\=": (700, "xfx", "none"),   # no unificación
     "==": (700, "xfx", "none"),    # igualdad estricta
@@ -79,9 +87,16 @@ PREDEFINED_OPERATORS = {
     "//": (400, "yfx", "left"),    # división entera
     "mod": (400, "yfx", "left"),   # módulo
     "**": (200, "xfx", "none"),    # potencia
-    "-": (200, "fy", "none"),      # negación unaria
-    "+": (200, "fy", "none"),      # signo positivo unario
-}
+})
+
+UNARY_OPS = MappingProxyType({
+    "\\+": (900, "fy", "none"),   # negación
+    "-": (200, "fy", "none"),     # negación unaria
+    "+": (200, "fy", "none"),     # signo positivo unario
+})
+
+# Vista combinada para consumidores legados; los binarios tienen prioridad.
+PREDEFINED_OPERATORS = ChainMap(dict(BINARY_OPS), dict(UNARY_OPS))
 
 
 # Nombres de archivos estándar
@@ -7,97 +7,283 @@ bindings simple que usará el unificador y el motor.
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
+from itertools import count
 from typing import Any, Dict, Iterable, List as PyList, Optional, Sequence, Tuple, Union
+from weakref import WeakValueDictionary
 
 
 # Representación de términos -------------------------------------------------
 
 
+# Etiquetas de tipo (type tags): un entero de clase por subtipo de término.
+# Los bucles calientes de solver/unify despachan con una carga de atributo +
+# comparación de ints en vez de isinstance (que recorre el MRO por llamada).
+KIND_VAR = 0
+KIND_ATOM = 1
+KIND_NUM = 2
+KIND_COMP = 3
+KIND_LIST = 4
+
+
 class Term:
 	"""Supertipo de todos los términos Prolog."""
 
+	# Sin __dict__ por instancia: los subtipos declaran sus campos vía slots.
+	__slots__ = ()
+
+	KIND = -1  # sobreescrito por cada subtipo (ver KIND_* arriba)
+
 	def __repr__(self) -> str:  # pragma: no cover - debug helper
 		return self.__str__()
 
 
-@dataclass(frozen=True)
+# Pool de interning (flyweight) de átomos: un único Atom por nombre, con
+# referencias débiles para no retener átomos que ya nadie usa.
+_atom_pool: "WeakValueDictionary[str, Atom]" = WeakValueDictionary()
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class Atom(Term):
+	KIND = KIND_ATOM
+
 	name: str
+	# Hash precalculado: evita rehashear el nombre en cada operación dict/set.
+	_h: int = field(default=0, compare=False, repr=False)
+
+	def __new__(cls, name: str, _h: int = 0) -> "Atom":
+		# Interning: Atom("x") is Atom("x"), lo que habilita comparaciones
+		# por identidad y elimina la mayoría de las asignaciones de átomos.
+		# El nombre también se interna como string: el == entre names y
+		# functors corta por identidad de puntero en CPython.
+		name = sys.intern(name)
+		cached = _atom_pool.get(name)
+		if cached is not None:
+			return cached
+		# object.__new__ explícito: slots=True recrea la clase y rompe la
+		# celda __class__ que necesita super() sin argumentos.
+		self = object.__new__(cls)
+		_atom_pool[name] = self
+		return self
+
+	def __post_init__(self) -> None:
+		object.__setattr__(self, "_h", hash(self.name))
+
+	def __hash__(self) -> int:
+		return self._h
 
 	def __str__(self) -> str:  # pragma: no cover
 		return self.name
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Number(Term):
+	KIND = KIND_NUM
+
 	value: Union[int, float]
 
 	def __str__(self) -> str:  # pragma: no cover
 		return str(self.value)
 
 
-# Contador para IDs únicos de variables
-_var_id_counter = 0
+# Caché de enteros pequeños (espejo del caché de ints de CPython): los
+# literales repetidos comparten instancia, ahorrando asignaciones y hash.
+_NUM_CACHE = [Number(i) for i in range(-128, 257)]
+
+
+def make_number(value: Union[int, float]) -> Number:
+	"""Construye un Number, reutilizando instancias para ints pequeños."""
+	if isinstance(value, int) and -128 <= value <= 256:
+		return _NUM_CACHE[value + 128]
+	return Number(value)
 
-def _next_var_id() -> int:
-	global _var_id_counter
-	_var_id_counter += 1
-	return _var_id_counter
 
+# Contador para IDs únicos de variables: iterador count en C, sin el
+# global-store por variable creada (mismo esquema que utils.helpers).
+_next_var_id = count(1).__next__
 
-@dataclass(unsafe_hash=True)
+
+@dataclass(unsafe_hash=True, slots=True)
 class Variable(Term):
-	name: str
-	id: int = field(default_factory=_next_var_id, compare=False)
+	KIND = KIND_VAR
+
+	# Solo `id` participa en __eq__/__hash__: hashear un entero es más barato
+	# que hashear el nombre y dos variables son la misma sii comparten id.
+	name: str = field(compare=False)
+	id: int = field(default_factory=_next_var_id)
+	# Cuántos términos/bindings referencian esta variable. Una variable con
+	# ref_count == 0 no puede aparecer dentro de ningún término, lo que
+	# permite saltarse el occurs-check (ver solver/unify.py).
+	ref_count: int = field(default=0, compare=False)
 
 	def __str__(self) -> str:  # pragma: no cover
 		return self.name
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class Compound(Term):
+	KIND = KIND_COMP
+
 	functor: str
 	args: Tuple[Term, ...]
-
-	def arity(self) -> int:
-		return len(self.args)
+	# Hash precalculado en construcción: sin él, cada operación dict/set
+	# rehashea recursivamente todos los subtérminos (cuadrático en términos
+	# profundos).
+	_h: int = field(default=0, compare=False, repr=False)
+	# Flag "sin variables libres", calculado en construcción AND-eando el de
+	# los hijos; permite consultas is_ground en O(1).
+	_ground: bool = field(default=False, compare=False, repr=False)
+	# Clave (functor, aridad) precalculada: el dispatch de builtins la hashea
+	# en cada goal y así no se reconstruye la tupla por llamada.
+	_key: Tuple[str, int] = field(default=("", 0), compare=False, repr=False)
+	# Aridad como atributo precalculado: los consumidores leen t.arity sin
+	# pagar una invocación de método por consulta.
+	arity: int = field(default=0, compare=False, repr=False)
+	# Valor aritmético memoizado (solo términos ground): un subtérmino
+	# constante como 2+3*4 se evalúa una vez; como los builders de cuerpo
+	# comparten los subtérminos ground entre activaciones, el plegado se
+	# reaprovecha en cada is/2 (ver prolog_builtins/arith.py).
+	_arith: Optional[Union[int, float]] = field(default=None, compare=False, repr=False)
+
+	def __post_init__(self) -> None:
+		# Functor internado: el != de unify y los lookups por (functor, arity)
+		# comparan/hashean strings calientes que así cortan por identidad.
+		object.__setattr__(self, "functor", sys.intern(self.functor))
+		object.__setattr__(self, "_h", hash((self.functor, self.args)))
+		n = len(self.args)
+		object.__setattr__(self, "_key", (self.functor, n))
+		object.__setattr__(self, "arity", n)
+		ground = True
+		for a in self.args:
+			if isinstance(a, Variable):
+				# El término ahora referencia a la variable (para el
+				# short-circuit del occurs-check).
+				a.ref_count += 1
+				ground = False
+			elif not is_ground(a):
+				ground = False
+		object.__setattr__(self, "_ground", ground)
+
+	def __hash__(self) -> int:
+		return self._h
 
 	def __str__(self) -> str:  # pragma: no cover
-		if self.arity() == 0:
+		if self.arity == 0:
 			return self.functor
 		inner = ", ".join(map(str, self.args))
 		return f"{self.functor}({inner})"
 
 
+# Pool de hash-consing de términos compuestos ground: dos construcciones
+# estructuralmente idénticas comparten instancia (como el pool de átomos), lo
+# que habilita el atajo por identidad de unify/== y comparte la memoria de
+# subtérminos comunes entre cláusulas. Solo se pool-ean términos ground: son
+# inmutables y libres de contexto (los no-ground contienen Variables vivas).
+_compound_pool: "WeakValueDictionary[Tuple[str, Tuple[Term, ...]], Compound]" = WeakValueDictionary()
+
+
+def make_compound(functor: str, args: Tuple[Term, ...]) -> Compound:
+	"""Construye un Compound, reutilizando la instancia ground equivalente."""
+	c = Compound(functor, args)
+	if c._ground:
+		key = (c.functor, c.args)
+		cached = _compound_pool.get(key)
+		if cached is not None:
+			return cached
+		_compound_pool[key] = c
+	return c
+
+
+# Lista vacía canónica: evita reconstruir Atom("[]") en cada operación de lista.
+NIL = Atom("[]")
+
+
+class PList(Term):
+	"""Vista compacta de una lista cerrada sobre una tupla de elementos.
+
+	Evita materializar n celdas '.'/2 al construir listas cerradas: guarda
+	los elementos en una tupla y genera la cadena de cons de forma perezosa
+	(una sola vez, cacheada) cuando algún consumidor la necesita.
+	"""
+
+	__slots__ = ("items", "_cons")
+
+	KIND = KIND_LIST
+
+	def __init__(self, items: Sequence[Term]):
+		self.items: Tuple[Term, ...] = tuple(items)
+		self._cons: Optional[Term] = None
+		for item in self.items:
+			if isinstance(item, Variable):
+				item.ref_count += 1
+
+	def as_cons(self) -> Term:
+		"""Materializa (y cachea) la representación '.'/2 equivalente."""
+		cons = self._cons
+		if cons is None:
+			cons = NIL
+			for item in reversed(self.items):
+				cons = Compound(".", (item, cons))
+			self._cons = cons
+		return cons
+
+	def __eq__(self, other: object) -> bool:
+		if isinstance(other, PList):
+			return self.items == other.items
+		if isinstance(other, (Compound, Atom)):
+			return self.as_cons() == other
+		return NotImplemented
+
+	def __hash__(self) -> int:
+		return hash(self.as_cons())
+
+	def __str__(self) -> str:  # pragma: no cover
+		return f"[{', '.join(map(str, self.items))}]"
+
+
+def is_ground(term: Term) -> bool:
+	"""Indica si un término no contiene variables libres (O(1) para Compound)."""
+	if isinstance(term, Variable):
+		return False
+	if isinstance(term, Compound):
+		return term._ground
+	if isinstance(term, PList):
+		return all(map(is_ground, term.items))
+	return True
+
+
 def List(items: Sequence[Term]) -> Term:
 	"""Construye una lista Prolog a partir de una secuencia Python.
 
 	Representación como términos '.'/2 y '[]'.
 	"""
 
-	nil = Atom("[]")
-	result: Term = nil
+	result: Term = NIL
 	for item in reversed(items):
 		result = Compound(".", (item, result))
 	return result
 
 
 def is_list(term: Term) -> bool:
-	if isinstance(term, Atom) and term.name == "[]":
+	if isinstance(term, PList):
 		return True
-	if isinstance(term, Compound) and term.functor == "." and len(term.args) == 2:
-		return is_list(term.args[1])
-	return False
+	# Iterativo: la versión recursiva pagaba un frame por elemento y
+	# desbordaba la pila con listas largas.
+	while isinstance(term, Compound) and term.functor == "." and len(term.args) == 2:
+		term = term.args[1]
+	return term is NIL
 
 
 def list_to_python(term: Term) -> PyList[Term]:
 	"""Convierte una lista Prolog bien formada en lista Python."""
+	if isinstance(term, PList):
+		return list(term.items)
 	out: PyList[Term] = []
 	while isinstance(term, Compound) and term.functor == "." and len(term.args) == 2:
 		out.append(term.args[0])
 		term = term.args[1]
-	if not (isinstance(term, Atom) and term.name == "[]"):
+	if term is not NIL:
 		raise ValueError("lista Prolog mal formada")
 	return out
 
@@ -105,10 +291,19 @@ def list_to_python(term: Term) -> PyList[Term]:
 # Cláusulas ------------------------------------------------------------------
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Clause:
 	head: Compound
 	body: Tuple[Compound, ...]  # conjunción de goals
+	# Hash precalculado: las cláusulas son claves de los dicts de matchers y
+	# builders de cuerpo de la KB, consultados en cada activación.
+	_h: int = field(default=0, compare=False, repr=False)
+
+	def __post_init__(self) -> None:
+		object.__setattr__(self, "_h", hash((self.head, self.body)))
+
+	def __hash__(self) -> int:
+		return self._h
 
 	def is_fact(self) -> bool:
 		return len(self.body) == 0
@@ -120,9 +315,16 @@ class Clause:
 Bindings = Dict[int, Term]
 
 
-@dataclass
+@dataclass(slots=True)
 class Env:
-	"""Entorno de bindings de variables (por id)."""
+	"""Entorno de bindings de variables (por id).
+
+	Dict id -> término: el costo de cada entorno escala con los bindings de
+	la activación, no con cuántas variables creó el proceso. Una lista densa
+	indexada por el id global obliga a rellenar (y copiar en cada copy())
+	hasta el id máximo de la sesión, lo que degrada consultas idénticas a
+	medida que el contador global crece.
+	"""
 
 	bindings: Bindings = field(default_factory=dict)
 
@@ -131,7 +333,14 @@ class Env:
 
 	def set(self, v: Variable, t: Term) -> None:
 		self.bindings[v.id] = t
+		if isinstance(t, Variable):
+			# El binding crea una referencia var->var (occurs-check).
+			t.ref_count += 1
+
+	def unbind(self, vid: int) -> None:
+		"""Deshace el binding de la variable con id `vid` (para backtracking)."""
+		self.bindings.pop(vid, None)
 
 	def copy(self) -> "Env":
-		return Env(dict(self.bindings))
+		return Env(self.bindings.copy())
 
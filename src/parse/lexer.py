@@ -3,12 +3,18 @@ Tokenizador (lexer) para un subconjunto de Prolog.
 
 Soporta: átomos, variables, números, paréntesis, coma, punto, listas
 ([, ], |) y el operador ':-' para reglas. Comentarios: '%' de línea.
+
+El escaneo se hace con una única regex compilada en vez de avanzar
+carácter por carácter en Python: el motor de re tokeniza en C con un
+rendimiento de un orden de magnitud mayor que el bucle por caracteres.
 """
 
 from __future__ import annotations
 
+import re
+import sys
 from dataclasses import dataclass
-from typing import Iterator, Optional, Tuple
+from typing import Iterator
 
 from core.errors import SyntaxErrorProlog
 
@@ -21,145 +27,73 @@ class Token:
     col: int
 
 
+# Una alternativa por clase de token; el orden importa (':-' antes que
+# cualquier regla que pudiera comerse el ':'). WS y COMMENT se filtran.
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<WS>\s+)
+    | (?P<COMMENT>%[^\n]*)
+    | (?P<RULE>:-)
+    | (?P<NUMBER>\d+(?:\.\d+)?)
+    | (?P<NAME>[^\W\d]\w*)
+    | (?P<PUNCT>[(),\[\]|.])
+    | (?P<OP>=\\=|=:=|=<|>=|\\=|[+\-*/^<>=])
+    """,
+    re.VERBOSE,
+)
+
+
 class Lexer:
     def __init__(self, source: str):
         self.source = source
-        self.i = 0
-        self.line = 1
-        self.col = 1
-
-    def _peek_char(self) -> str:
-        return "" if self.i >= len(self.source) else self.source[self.i]
-
-    def _advance(self) -> str:
-        ch = self._peek_char()
-        if not ch:
-            return ""
-        self.i += 1
-        if ch == "\n":
-            self.line += 1
-            self.col = 1
-        else:
-            self.col += 1
-        return ch
-
-    def _match(self, expected: str) -> bool:
-        if self._peek_char() == expected:
-            self._advance()
-            return True
-        return False
 
     def tokens(self) -> Iterator[Token]:
-        while True:
-            tok = self._next_token()
-            yield tok
-            if tok.kind == "EOF":
-                break
-
-    def _skip_ws_and_comments(self) -> None:
-        while True:
-            ch = self._peek_char()
-            if not ch:  # EOF, salir inmediatamente
-                break
-            if ch in " \t\r\n":
-                self._advance()
+        source = self.source
+        n = len(source)
+        pos = 0
+        line = 1
+        line_start = 0  # offset del inicio de la línea actual
+
+        while pos < n:
+            m = _TOKEN_RE.match(source, pos)
+            if m is None:
+                col = pos - line_start + 1
+                raise SyntaxErrorProlog(
+                    f"carácter inesperado: '{source[pos]}'", line, col
+                )
+
+            kind = m.lastgroup
+            lexeme = m.group()
+            start = m.start()
+            pos = m.end()
+
+            if kind == "WS":
+                # Actualizar línea/columna contando saltos dentro del blanco
+                newlines = lexeme.count("\n")
+                if newlines:
+                    line += newlines
+                    line_start = start + lexeme.rfind("\n") + 1
                 continue
-            # comentario de línea: % ... \n
-            if ch == "%":
-                self._advance()  # consumir el %
-                while True:
-                    nch = self._peek_char()
-                    if not nch or nch == "\n":
-                        break
-                    self._advance()
-                # Consumir el salto de línea final si existe
-                if self._peek_char() == "\n":
-                    self._advance()
+            if kind == "COMMENT":
                 continue
-            break
-
-    def _next_token(self) -> Token:
-        self._skip_ws_and_comments()
-        start_line, start_col = self.line, self.col
-        ch = self._peek_char()
-        if not ch:
-            return Token("EOF", "", start_line, start_col)
-
-        # puntación simple
-        if ch in "(),[].|":
-            self._advance()
-            return Token(ch, ch, start_line, start_col)
-        
-        # Operadores infijos
-        if ch == "+":
-            self._advance()
-            return Token("+", "+", start_line, start_col)
-        
-        if ch == "-":
-            self._advance()
-            return Token("-", "-", start_line, start_col)
-        
-        if ch == "*":
-            self._advance()
-            return Token("*", "*", start_line, start_col)
-        
-        if ch == "/":
-            self._advance()
-            return Token("/", "/", start_line, start_col)
-        
-        if ch == "^":
-            self._advance()
-            return Token("^", "^", start_line, start_col)
-
-        # ':-'
-        if ch == ":":
-            self._advance()
-            if self._match("-"):
-                return Token(":-", ":-", start_line, start_col)
-            raise SyntaxErrorProlog("se esperaba '-' tras ':'", start_line, start_col)
-
-        # '.' final de cláusula
-        if ch == ".":
-            self._advance()
-            return Token(".", ".", start_line, start_col)
-
-        # variable (Mayúscula o _)
-        if ch == "_" or ch.isalpha() and ch.isupper():
-            ident = self._consume_ident()
-            return Token("VAR", ident, start_line, start_col)
-
-        # átomo (minúscula inicial) o nombre de functor
-        if ch.isalpha() and ch.islower():
-            ident = self._consume_ident()
-            return Token("ATOM", ident, start_line, start_col)
-
-        # número
-        if ch.isdigit():
-            num = self._consume_number()
-            return Token("NUMBER", num, start_line, start_col)
-
-        raise SyntaxErrorProlog(f"carácter inesperado: '{ch}'", start_line, start_col)
-
-    def _consume_ident(self) -> str:
-        start = self.i
-        while True:
-            ch = self._peek_char()
-            if ch.isalnum() or ch == "_":
-                self._advance()
+
+            col = start - line_start + 1
+            if kind == "NAME":
+                # Un solo grupo Unicode para identificadores; la separación
+                # VAR/ATOM se decide por el primer carácter con isupper(),
+                # como hacía el lexer por caracteres. Clases ASCII tipo
+                # [_A-Z]/[a-z] rechazarían 'ñoño' o 'Ávar', y no hay clase de
+                # regex que replique isupper() sobre todo Unicode.
+                first = lexeme[0]
+                kind = "VAR" if first == "_" or first.isupper() else "ATOM"
+                yield Token(kind, lexeme, line, col)
+            elif kind in ("PUNCT", "OP", "RULE"):
+                # La puntuación y los operadores usan el lexema como kind
+                # ('(', ',', '.', '+', ':-', ...), igual que el parser espera.
+                # sys.intern: los kinds son claves calientes y estables; el ==
+                # de strings internados corta por identidad de puntero.
+                yield Token(sys.intern(lexeme), lexeme, line, col)
             else:
-                break
-        return self.source[start:self.i]
-
-    def _consume_number(self) -> str:
-        start = self.i
-        while self._peek_char().isdigit():
-            self._advance()
-        if self._peek_char() == "." and self._peek_next().isdigit():
-            self._advance()
-            while self._peek_char().isdigit():
-                self._advance()
-        return self.source[start:self.i]
-
-    def _peek_next(self) -> str:
-        return "" if self.i + 1 >= len(self.source) else self.source[self.i + 1]
+                yield Token(kind, lexeme, line, col)
 
+        yield Token("EOF", "", line, n - line_start + 1)
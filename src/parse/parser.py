@@ -10,53 +10,102 @@ Soporta:
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
-from typing import Dict, List as PyList, Tuple
+from typing import Dict, Iterator, List as PyList, Tuple
 
 from core.errors import SyntaxErrorProlog
-from core.types import Atom, Clause, Compound, Number, Term, Variable
+from core.types import NIL, Atom, Clause, Compound, Number, PList, Term, Variable, make_compound, make_number
 from parse.lexer import Lexer, Token
 
 
 #precedencia de operadores (menor número = mayor precedencia)
 #baasado en Prolog estándar
 OPERATOR_PRECEDENCE = {
-    "^": 200,   # Potencia (más alta precedencia)
-    "*": 400,   # Multiplicación
-    "/": 400,   # División
-    "+": 500,   # Suma
-    "-": 500,   # Resta
+    "^": 200,    # Potencia (más alta precedencia)
+    "*": 400,    # Multiplicación
+    "/": 400,    # División
+    "+": 500,    # Suma
+    "-": 500,    # Resta
+    "=": 700,    # Unificación
+    "\\=": 700,  # No unificación
+    "=:=": 700,  # Igualdad aritmética
+    "=\\=": 700, # Desigualdad aritmética
+    "<": 700,    # Menor
+    ">": 700,    # Mayor
+    "=<": 700,   # Menor o igual
+    ">=": 700,   # Mayor o igual
 }
 
+# Operadores asociativos a la derecha; el resto asocia a la izquierda.
+# Vacío a propósito: el parser histórico trataba todos los infijos (incluido
+# '^') como asociativos a la izquierda, y los programas existentes dependen de
+# ello (p. ej. la regla de potencia de derivadas espera x^2^3 = (x^2)^3, con
+# exponente numérico a la derecha). Adoptar el xfy estándar para '^' sería un
+# cambio de comportamiento aparte: bastaría con añadirlo a este frozenset.
+_RIGHT_ASSOC: frozenset = frozenset()
+
 
 class Parser:
 	def __init__(self, text: str):
 		self.lexer = Lexer(text)
-		self._tokens = list(self.lexer.tokens())
+		# Tokens en layout SoA (structure of arrays): cuatro listas paralelas
+		# en lugar de objetos Token. El chequeo caliente del parser es "¿de qué
+		# kind es el token actual?", que así se reduce a un índice de lista
+		# (self._kinds[self.pos]) sin despacho de atributos ni un objeto por
+		# token. Los kinds ya vienen internados del lexer: la comparación ==
+		# suele resolverse por identidad de puntero.
+		kinds: PyList[str] = []
+		lexemes: PyList[str] = []
+		lines: PyList[int] = []
+		cols: PyList[int] = []
+		for tok in self.lexer.tokens():
+			kinds.append(tok.kind)
+			lexemes.append(tok.lexeme)
+			lines.append(tok.line)
+			cols.append(tok.col)
+		self._kinds = kinds
+		self._lexemes = lexemes
+		self._lines = lines
+		self._cols = cols
 		self.pos = 0
 		self.var_map: Dict[str, Variable] = {}
 
-	def _peek(self) -> Token:
-		return self._tokens[self.pos]
+	def _peek_kind(self) -> str:
+		return self._kinds[self.pos]
+
+	def _advance(self) -> None:
+		if self._kinds[self.pos] != "EOF":
+			self.pos += 1
+
+	def _take_lexeme(self) -> str:
+		"""Lexema del token actual, consumiéndolo."""
+		lex = self._lexemes[self.pos]
+		self._advance()
+		return lex
 
-	def _advance(self) -> Token:
-		tok = self._tokens[self.pos]
-		self.pos += 1
-		return tok
+	def _error(self, msg: str) -> SyntaxErrorProlog:
+		p = self.pos
+		return SyntaxErrorProlog(msg, self._lines[p], self._cols[p])
 
-	def _expect(self, kind: str) -> Token:
-		tok = self._peek()
-		if tok.kind != kind:
-			raise SyntaxErrorProlog(f"se esperaba {kind}, se encontró {tok.kind}", tok.line, tok.col)
-		return self._advance()
+	def _expect(self, kind: str) -> None:
+		if self._kinds[self.pos] != kind:
+			raise self._error(f"se esperaba {kind}, se encontró {self._kinds[self.pos]}")
+		self._advance()
 
 	# Entrada publica --------------------------------------------------------
 
 	def parse_clause(self) -> Clause:
 		self.var_map = {}
+		if self._kinds[self.pos] == ":-":
+			# Directiva: ':- goal.' se representa como cabeza ':-'/1 sin
+			# cuerpo; el loader la intercepta (p. ej. ':- table(f/2).').
+			self._advance()
+			goal = self.parse_compound_like()
+			self._expect(".")
+			return Clause(Compound(":-", (goal,)), tuple())
 		head = self.parse_compound_like()
-		tok = self._peek()
-		if tok.kind == ":-":
+		if self._kinds[self.pos] == ":-":
 			self._advance()
 			goals = self.parse_goals()
 			self._expect(".")
@@ -70,7 +119,7 @@ class Parser:
 		# Ej: p :- q(X), r(Y).
 		goals: PyList[Compound] = []
 		goals.append(self.parse_compound_like())
-		while self._peek().kind == ",":
+		while self._kinds[self.pos] == ",":
 			self._advance()
 			goals.append(self.parse_compound_like())
 		return goals
@@ -81,162 +130,164 @@ class Parser:
 			return term
 		if isinstance(term, Atom):
 			return Compound(term.name, tuple())
-		raise SyntaxErrorProlog("la cabeza/cuerpo debe ser un predicado (átomo o compuesto)", self._peek().line, self._peek().col)
+		raise self._error("la cabeza/cuerpo debe ser un predicado (átomo o compuesto)")
 
 	def parse_term(self) -> Term:
 		"""Parsea un término, incluyendo operadores infijos con precedencia."""
 		return self.parse_expression(max(OPERATOR_PRECEDENCE.values()) + 1)
-	
+
 	def parse_expression(self, max_precedence: int) -> Term:
 		"""Parsea expresiones con operadores infijos respetando precedencia.
-		
+
+		Versión iterativa (precedence climbing / shunting-yard): mantiene pilas
+		explícitas de operandos y operadores en vez de recursar por operador,
+		evitando un frame de Python por cada infijo de la expresión.
+
 		Args:
 			max_precedence: Precedencia máxima permitida para operadores en este nivel
 		"""
-		# Parsear el término primario (lado izquierdo)
-		left = self.parse_primary()
-		
-		# Parsear operadores infijos mientras tengan precedencia adecuada
+		# Aliases locales: evitan lookups de atributo/global por iteración
+		kinds = self._kinds
+		get_prec = OPERATOR_PRECEDENCE.get
+		right_assoc = _RIGHT_ASSOC
+
+		operands: PyList[Term] = [self.parse_primary()]
+		ops: PyList[Tuple[str, int]] = []
+
 		while True:
-			tok = self._peek()
-			op = tok.kind
-			
-			# Verificar si es un operador infijo
-			if op not in OPERATOR_PRECEDENCE:
-				break
-			
-			# Verificar precedencia
-			precedence = OPERATOR_PRECEDENCE[op]
-			if precedence >= max_precedence:
+			op = kinds[self.pos]
+			prec = get_prec(op)
+			if prec is None or prec >= max_precedence:
 				break
-			
-			# Consumir el operador
-			self._advance()
-			
-			# Parsear el lado derecho con precedencia apropiada
-			# Para asociatividad izquierda, usamos precedence
-			# Para asociatividad derecha (como ^), usamos precedence + 1
-			if op == "^":
-				# Potencia es asociativa a la derecha: 2^3^4 = 2^(3^4)
-				right = self.parse_expression(precedence)
-			else:
-				# Otros operadores son asociativos a la izquierda
-				right = self.parse_expression(precedence)
-			
-			# Crear el término compuesto para el operador
-			left = Compound(op, (left, right))
-		
-		return left
-	
+			self.pos += 1
+			# Reducir la pila mientras el tope ligue más fuerte (menor número =
+			# mayor precedencia); en empate solo reduce si es asociativo a la
+			# izquierda (hoy todos: _RIGHT_ASSOC está vacío).
+			while ops and (ops[-1][1] < prec or (ops[-1][1] == prec and op not in right_assoc)):
+				top_op, _ = ops.pop()
+				right = operands.pop()
+				operands[-1] = make_compound(top_op, (operands[-1], right))
+			ops.append((op, prec))
+			operands.append(self.parse_primary())
+
+		# Drenar los operadores pendientes (el tope liga más fuerte)
+		while ops:
+			top_op, _ = ops.pop()
+			right = operands.pop()
+			operands[-1] = make_compound(top_op, (operands[-1], right))
+
+		return operands[0]
+
 	def parse_primary(self) -> Term:
 		"""Parsea términos primarios (números, variables, átomos, compuestos, listas, paréntesis)."""
-		tok = self._peek()
-		
-		# Números
-		if tok.kind == "NUMBER":
-			self._advance()
-			val = tok.lexeme
-			if "." in val:
-				return Number(float(val))
-			return Number(int(val))
-		
-		# Variables
-		if tok.kind == "VAR":
-			self._advance()
-			# Usar la misma instancia de Variable para el mismo nombre en la cláusula
-			var_name = tok.lexeme
-			if var_name not in self.var_map:
-				self.var_map[var_name] = Variable(var_name)
-			return self.var_map[var_name]
-		
-		# Operadores usados como functores: +(A, B), -(X, Y), etc.
-		if tok.kind in OPERATOR_PRECEDENCE:
-			op = tok.kind
+		kind = self._kinds[self.pos]
+
+		handler = self._PRIMARY_DISPATCH.get(kind)
+		if handler is not None:
+			return handler(self)
+
+		if kind == "EOF":
+			raise self._error("entrada inesperadamente terminada")
+
+		raise self._error(f"token inesperado: {kind}")
+
+	# Handlers de parse_primary ----------------------------------------------
+
+	def _parse_number(self) -> Term:
+		"""Números enteros o de punto flotante."""
+		val = self._take_lexeme()
+		if "." in val:
+			return make_number(float(val))
+		return make_number(int(val))
+
+	def _parse_var(self) -> Term:
+		"""Variables; misma instancia para el mismo nombre dentro de la cláusula."""
+		var_name = self._take_lexeme()
+		if var_name not in self.var_map:
+			self.var_map[var_name] = Variable(var_name)
+		return self.var_map[var_name]
+
+	def _parse_operator_functor(self) -> Term:
+		"""Operadores usados como functores: +(A, B), -(X, Y), etc."""
+		op = self._kinds[self.pos]
+		self._advance()
+		# Solo permitir si está seguido por (
+		if self._kinds[self.pos] == "(":
 			self._advance()
-			# Solo permitir si está seguido por (
-			if self._peek().kind == "(":
-				self._advance()
-				args: PyList[Term] = []
-				if self._peek().kind != ")":
-					args.append(self.parse_term())
-					while self._peek().kind == ",":
-						self._advance()
-						args.append(self.parse_term())
-				self._expect(")")
-				return Compound(op, tuple(args))
-			else:
-				# Si no hay (, es un error (operador usado sin argumentos)
-				raise SyntaxErrorProlog(f"operador '{op}' requiere argumentos entre paréntesis", tok.line, tok.col)
-		
-		# Átomos y functores
-		if tok.kind == "ATOM":
+			args = self._parse_arg_list()
+			return make_compound(op, args)
+		# Si no hay (, es un error (operador usado sin argumentos)
+		raise self._error(f"operador '{op}' requiere argumentos entre paréntesis")
+
+	def _parse_atom_or_compound(self) -> Term:
+		"""Átomos simples o términos compuestos functor(args)."""
+		functor = self._take_lexeme()
+
+		# Verificar si tiene argumentos (término compuesto)
+		if self._kinds[self.pos] == "(":
 			self._advance()
-			functor = tok.lexeme
-			
-			# Verificar si tiene argumentos (término compuesto)
-			if self._peek().kind == "(":
+			args = self._parse_arg_list()
+			return make_compound(functor, args)
+
+		# Átomo simple
+		return Atom(functor)
+
+	def _parse_arg_list(self) -> Tuple[Term, ...]:
+		"""Argumentos separados por coma hasta ')' (ya consumido el '(')."""
+		args: PyList[Term] = []
+		if self._kinds[self.pos] != ")":
+			args.append(self.parse_term())
+			while self._kinds[self.pos] == ",":
 				self._advance()
-				args: PyList[Term] = []
-				if self._peek().kind != ")":
-					args.append(self.parse_term())
-					while self._peek().kind == ",":
-						self._advance()
-						args.append(self.parse_term())
-				self._expect(")")
-				return Compound(functor, tuple(args))
-			
-			# Átomo simple
-			return Atom(functor)
-		
-		# Listas
-		if tok.kind == "[":
-			return self._parse_list()
-		
-		# Expresiones entre paréntesis
-		if tok.kind == "(":
-			self._advance()
-			inner = self.parse_term()
-			self._expect(")")
-			return inner
-		
-		# Operador - unario (negación)
-		if tok.kind == "-":
-			self._advance()
-			operand = self.parse_primary()
-			return Compound("-", (operand,))
-		
-		if tok.kind == "EOF":
-			raise SyntaxErrorProlog("entrada inesperadamente terminada", tok.line, tok.col)
-		
-		raise SyntaxErrorProlog(f"token inesperado: {tok.kind}", tok.line, tok.col)
+				args.append(self.parse_term())
+		self._expect(")")
+		return tuple(args)
+
+	def _parse_paren(self) -> Term:
+		"""Expresiones entre paréntesis."""
+		self._advance()
+		inner = self.parse_term()
+		self._expect(")")
+		return inner
 
 	def _parse_list(self) -> Term:
 		# Listas: [a,b]  |  [H|T]
 		self._expect("[")
 		elements: PyList[Term] = []
-		tok = self._peek()
-		if tok.kind == "]":
+		if self._kinds[self.pos] == "]":
 			self._advance()
-			return Atom("[]")
+			return NIL
 		elements.append(self.parse_term())
-		while self._peek().kind == ",":
+		while self._kinds[self.pos] == ",":
 			self._advance()
 			elements.append(self.parse_term())
-		if self._peek().kind == "|":
+		if self._kinds[self.pos] == "|":
 			self._advance()
 			tail = self.parse_term()
 			self._expect("]")
 			# construir lista puntada
 			term = tail
 			for el in reversed(elements):
-				term = Compound(".", (el, term))
+				term = make_compound(".", (el, term))
 			return term
 		self._expect("]")
-		# lista cerrada
-		term = Atom("[]")
-		for el in reversed(elements):
-			term = Compound(".", (el, term))
-		return term
+		# lista cerrada: vista compacta sin materializar celdas cons
+		return PList(elements)
+
+	# Dispatch O(1) por kind de token para parse_primary, en lugar de una
+	# cadena if/elif con varias comparaciones de strings por término. A nivel
+	# de clase (funciones sin ligar, se invocan como handler(self)): el dict se
+	# construye una sola vez, no en cada Parser.
+	_PRIMARY_DISPATCH = {
+		"NUMBER": _parse_number,
+		"VAR": _parse_var,
+		"ATOM": _parse_atom_or_compound,
+		"[": _parse_list,
+		"(": _parse_paren,
+	}
+	for _op in OPERATOR_PRECEDENCE:
+		_PRIMARY_DISPATCH[_op] = _parse_operator_functor
+	del _op
 
 
 # Funciones de conveniencia ---------------------------------------------------
@@ -246,10 +297,13 @@ def parse_clause(text: str) -> Clause:
 	return Parser(text).parse_clause()
 
 
-def parse_file(text: str) -> PyList[Clause]:
-	p = Parser(text)
-	clauses: PyList[Clause] = []
-	while p._peek().kind != "EOF":
-		clauses.append(p.parse_clause())
-	return clauses
+def parse_file(text: str) -> Iterator[Clause]:
+	"""Parsea un programa completo, produciendo las cláusulas en streaming.
 
+	Generador en vez de lista: el consumidor (loader) puede insertar cada
+	cláusula en el engine a medida que se parsea, sin acumular el AST
+	completo en memoria.
+	"""
+	p = Parser(text)
+	while p._kinds[p.pos] != "EOF":
+		yield p.parse_clause()
@@ -11,179 +11,227 @@ Implementa:
 from __future__ import annotations
 
 import math
-from typing import Any, Generator, List as PyList, Union
+import operator
+from typing import Any, Callable, Dict, Generator, List as PyList, Union
 
-from core.types import Atom, Compound, Env, Number, Term, Variable
-from solver.unify import Trail, deref, unify
+from core.types import Atom, Compound, Env, Number, Term, Variable, make_number
+from solver.unify import Trail, bind, deref, unify
+
+
+# Wrappers con chequeo de dominio (mismos mensajes que el evaluador original)
+
+
+def _safe_div(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    if b == 0:
+        raise ZeroDivisionError("División por cero")
+    return a / b
+
+
+def _safe_floordiv(a: Union[int, float], b: Union[int, float]) -> int:
+    if b == 0:
+        raise ZeroDivisionError("División por cero")
+    return int(a // b)
+
+
+def _safe_mod(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    if b == 0:
+        raise ZeroDivisionError("Módulo por cero")
+    return a % b
+
+
+def _safe_sqrt(x: Union[int, float]) -> float:
+    if x < 0:
+        raise ValueError("Raíz cuadrada de número negativo")
+    return math.sqrt(x)
+
+
+def _safe_log(x: Union[int, float]) -> float:
+    if x <= 0:
+        raise ValueError("Logaritmo de número no positivo")
+    return math.log(x)
+
+
+def _safe_log10(x: Union[int, float]) -> float:
+    if x <= 0:
+        raise ValueError("Logaritmo de número no positivo")
+    return math.log10(x)
+
+
+# Tablas de dispatch functor -> handler: un lookup hasheado por nodo de la
+# expresión en lugar de ~20 comparaciones de strings encadenadas.
+_BINOPS: Dict[str, Callable[..., Union[int, float]]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": _safe_div,
+    "//": _safe_floordiv,
+    "mod": _safe_mod,
+    "**": operator.pow,
+    "^": operator.pow,
+}
+
+_UNOPS: Dict[str, Callable[..., Union[int, float]]] = {
+    "-": operator.neg,
+    "abs": abs,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "sqrt": _safe_sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "exp": math.exp,
+    "log": _safe_log,
+    "ln": _safe_log,
+    "log10": _safe_log10,
+}
+
+_CONSTS: Dict[str, float] = {
+    "pi": math.pi,
+    "e": math.e,
+}
 
 
 def evaluate(expr: Term, env: Env) -> Union[int, float]:
     """Evalúa una expresión aritmética a un número.
-    
+
     Args:
         expr: Término que representa la expresión aritmética
         env: Entorno de variables
-        
+
     Returns:
         Número resultante de la evaluación
-        
+
     Raises:
         ValueError: Si la expresión no es evaluable
         ZeroDivisionError: En caso de división por cero
     """
-    expr = deref(expr, env)
-    
-    # Casos base: números directos
-    if isinstance(expr, Number):
-        return expr.value
-    
-    # Variables deben estar instanciadas
-    if isinstance(expr, Variable):
-        raise ValueError(f"Variable no instanciada: {expr.name}")
-    
-    # Átomos especiales
-    if isinstance(expr, Atom):
-        # Constantes matemáticas
-        if expr.name == "pi":
-            return math.pi
-        if expr.name == "e":
-            return math.e
-        raise ValueError(f"Átomo no evaluable: {expr.name}")
-    
-    # Términos compuestos (operadores y funciones)
-    if isinstance(expr, Compound):
-        functor = expr.functor
-        args = expr.args
-        
-        # Operadores binarios
-        if functor == "+" and len(args) == 2:
-            return evaluate(args[0], env) + evaluate(args[1], env)
-        
-        if functor == "-" and len(args) == 2:
-            return evaluate(args[0], env) - evaluate(args[1], env)
-        
-        if functor == "*" and len(args) == 2:
-            return evaluate(args[0], env) * evaluate(args[1], env)
-        
-        if functor == "/" and len(args) == 2:
-            divisor = evaluate(args[1], env)
-            if divisor == 0:
-                raise ZeroDivisionError("División por cero")
-            return evaluate(args[0], env) / divisor
-        
-        if functor == "//" and len(args) == 2:
-            divisor = evaluate(args[1], env)
-            if divisor == 0:
-                raise ZeroDivisionError("División por cero")
-            return int(evaluate(args[0], env) // divisor)
-        
-        if functor == "mod" and len(args) == 2:
-            divisor = evaluate(args[1], env)
-            if divisor == 0:
-                raise ZeroDivisionError("Módulo por cero")
-            return evaluate(args[0], env) % divisor
-        
-        if functor == "**" and len(args) == 2:
-            return evaluate(args[0], env) ** evaluate(args[1], env)
-        
-        if functor == "^" and len(args) == 2:
-            return evaluate(args[0], env) ** evaluate(args[1], env)
-        
-        # Operador unario negación
-        if functor == "-" and len(args) == 1:
-            return -evaluate(args[0], env)
-        
-        # Funciones matemáticas
-        if functor == "abs" and len(args) == 1:
-            return abs(evaluate(args[0], env))
-        
-        if functor == "floor" and len(args) == 1:
-            return math.floor(evaluate(args[0], env))
-        
-        if functor == "ceil" and len(args) == 1:
-            return math.ceil(evaluate(args[0], env))
-        
-        if functor == "sqrt" and len(args) == 1:
-            val = evaluate(args[0], env)
-            if val < 0:
-                raise ValueError("Raíz cuadrada de número negativo")
-            return math.sqrt(val)
-        
-        # Funciones trigonométricas
-        if functor == "sin" and len(args) == 1:
-            return math.sin(evaluate(args[0], env))
-        
-        if functor == "cos" and len(args) == 1:
-            return math.cos(evaluate(args[0], env))
-        
-        if functor == "tan" and len(args) == 1:
-            return math.tan(evaluate(args[0], env))
-        
-        if functor == "asin" and len(args) == 1:
-            return math.asin(evaluate(args[0], env))
-        
-        if functor == "acos" and len(args) == 1:
-            return math.acos(evaluate(args[0], env))
-        
-        if functor == "atan" and len(args) == 1:
-            return math.atan(evaluate(args[0], env))
-        
-        # Funciones exponenciales y logarítmicas
-        if functor == "exp" and len(args) == 1:
-            return math.exp(evaluate(args[0], env))
-        
-        if functor == "log" and len(args) == 1:
-            val = evaluate(args[0], env)
-            if val <= 0:
-                raise ValueError("Logaritmo de número no positivo")
-            return math.log(val)
-        
-        if functor == "ln" and len(args) == 1:
-            val = evaluate(args[0], env)
-            if val <= 0:
-                raise ValueError("Logaritmo natural de número no positivo")
-            return math.log(val)
-        
-        if functor == "log10" and len(args) == 1:
-            val = evaluate(args[0], env)
-            if val <= 0:
-                raise ValueError("Logaritmo de número no positivo")
-            return math.log10(val)
-        
-        raise ValueError(f"Función/operador no soportado: {functor}/{len(args)}")
-    
-    raise ValueError(f"Expresión no evaluable: {expr}")
+    # Camino rápido para la forma dominante op(a, b) con hojas ya numéricas
+    # (el idioma 'N is M + 1' de la recursión Prolog): aplica el handler
+    # directo, sin montar las pilas del intérprete post-orden.
+    if type(expr) is Compound and len(expr.args) == 2:
+        handler = _BINOPS.get(expr.functor)
+        if handler is not None:
+            a = deref(expr.args[0], env)
+            b = deref(expr.args[1], env)
+            if isinstance(a, Number) and isinstance(b, Number):
+                return handler(a.value, b.value)
 
+    # Evaluación post-orden iterativa: una pila de trabajo (term, stage) y una
+    # pila de valores, en vez de un frame de Python por nodo de la expresión.
+    # stage 0 = nodo por visitar; stage 1 = hijos ya evaluados, aplicar functor.
+    work = [(expr, 0)]
+    vals: PyList[Union[int, float]] = []
 
-def is_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """Predicado is/2: X is Expr.
-    
-    Evalúa la expresión aritmética Expr y unifica el resultado con X.
-    """
-    if len(args) != 2:
-        return
-    
-    lhs, rhs = args
-    
-    try:
-        # Evaluar la expresión del lado derecho
-        value = evaluate(rhs, env)
-        
-        # Unificar con el lado izquierdo
-        if unify(lhs, Number(value), env, trail, engine.occurs_check if engine else False):
-            yield env
-    except (ValueError, ZeroDivisionError, OverflowError):
-        # Si hay error aritmético, el predicado falla
-        return
+    while work:
+        node, stage = work.pop()
+
+        if stage == 1:
+            # node es un Compound cuyos argumentos ya están en vals
+            args = node.args
+            n = len(args)
+            handler = _BINOPS.get(node.functor) if n == 2 else _UNOPS.get(node.functor)
+            if handler is None:
+                raise ValueError(f"Función/operador no soportado: {node.functor}/{n}")
+            if n == 2:
+                rhs = vals.pop()
+                vals[-1] = handler(vals[-1], rhs)
+            else:
+                vals[-1] = handler(vals[-1])
+            if node._ground:
+                # Plegado de constantes: el subtérmino es compartido entre
+                # activaciones por los builders de cuerpo, así que memoizar
+                # su valor lo evalúa una sola vez en toda la ejecución.
+                object.__setattr__(node, "_arith", vals[-1])
+            continue
+
+        node = deref(node, env)
+
+        # Casos base: números directos
+        if isinstance(node, Number):
+            vals.append(node.value)
+            continue
+
+        # Términos compuestos: evaluar argumentos y luego aplicar el functor.
+        # Se apilan en orden inverso para que vals quede en orden de args.
+        if isinstance(node, Compound):
+            if node._arith is not None:
+                vals.append(node._arith)
+                continue
+            n = len(node.args)
+            if n not in (1, 2):
+                raise ValueError(f"Función/operador no soportado: {node.functor}/{n}")
+            work.append((node, 1))
+            for arg in reversed(node.args):
+                work.append((arg, 0))
+            continue
+
+        # Variables deben estar instanciadas
+        if isinstance(node, Variable):
+            raise ValueError(f"Variable no instanciada: {node.name}")
+
+        # Átomos especiales (constantes matemáticas)
+        if isinstance(node, Atom):
+            val = _CONSTS.get(node.name)
+            if val is not None:
+                vals.append(val)
+                continue
+            raise ValueError(f"Átomo no evaluable: {node.name}")
+
+        raise ValueError(f"Expresión no evaluable: {node}")
+
+    return vals[0]
+
+
+def make_is_2(occurs_check: bool = False) -> Any:
+    """Fabrica is/2 con el flag occurs_check capturado en el closure."""
+    def is_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
+        """Predicado is/2: X is Expr.
+
+        Evalúa la expresión aritmética Expr y unifica el resultado con X.
+        """
+        if len(args) != 2:
+            return False
+
+        lhs, rhs = args
+
+        # Camino rápido para el RHS: si ya dereferencia a un número no hay
+        # nada que evaluar (frecuente cuando el RHS viene ligado por unify).
+        r = deref(rhs, env)
+        if isinstance(r, Number):
+            value = r.value
+        else:
+            try:
+                value = evaluate(r, env)
+            except (ValueError, ZeroDivisionError, OverflowError):
+                # Si hay error aritmético, el predicado falla
+                return False
+
+        # Camino rápido para el LHS: el idioma dominante es 'is(N, +(M, 1))'
+        # con N libre; ligar directo evita todo el mecanismo de unify.
+        l = deref(lhs, env)
+        if isinstance(l, Variable):
+            bind(l, make_number(value), env, trail)
+            return True
+
+        return unify(l, make_number(value), env, trail, occurs_check)
+
+    return is_2
+
+
+# Instancia por defecto (sin occurs-check), para usos directos del módulo.
+is_2 = make_is_2()
 
 
-def arithmetic_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def arithmetic_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """Predicado =:=/2: X =:= Y.
     
     Evalúa ambos lados y verifica si son iguales.
     """
     if len(args) != 2:
-        return
+        return False
     
     lhs, rhs = args
     
@@ -191,19 +239,18 @@ def arithmetic_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail)
         val_lhs = evaluate(lhs, env)
         val_rhs = evaluate(rhs, env)
         
-        if val_lhs == val_rhs:
-            yield env
+        return val_lhs == val_rhs
     except (ValueError, ZeroDivisionError, OverflowError):
-        return
+        return False
 
 
-def arithmetic_not_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def arithmetic_not_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """Predicado =\\=/2: X =\\= Y.
     
     Evalúa ambos lados y verifica si son diferentes.
     """
     if len(args) != 2:
-        return
+        return False
     
     lhs, rhs = args
     
@@ -211,16 +258,15 @@ def arithmetic_not_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Tra
         val_lhs = evaluate(lhs, env)
         val_rhs = evaluate(rhs, env)
         
-        if val_lhs != val_rhs:
-            yield env
+        return val_lhs != val_rhs
     except (ValueError, ZeroDivisionError, OverflowError):
-        return
+        return False
 
 
-def less_than_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def less_than_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """Predicado </2: X < Y."""
     if len(args) != 2:
-        return
+        return False
     
     lhs, rhs = args
     
@@ -228,16 +274,15 @@ def less_than_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Gene
         val_lhs = evaluate(lhs, env)
         val_rhs = evaluate(rhs, env)
         
-        if val_lhs < val_rhs:
-            yield env
+        return val_lhs < val_rhs
     except (ValueError, ZeroDivisionError, OverflowError):
-        return
+        return False
 
 
-def less_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def less_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """Predicado =</2: X =< Y."""
     if len(args) != 2:
-        return
+        return False
     
     lhs, rhs = args
     
@@ -245,16 +290,15 @@ def less_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Gen
         val_lhs = evaluate(lhs, env)
         val_rhs = evaluate(rhs, env)
         
-        if val_lhs <= val_rhs:
-            yield env
+        return val_lhs <= val_rhs
     except (ValueError, ZeroDivisionError, OverflowError):
-        return
+        return False
 
 
-def greater_than_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def greater_than_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """Predicado >/2: X > Y."""
     if len(args) != 2:
-        return
+        return False
     
     lhs, rhs = args
     
@@ -262,16 +306,15 @@ def greater_than_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> G
         val_lhs = evaluate(lhs, env)
         val_rhs = evaluate(rhs, env)
         
-        if val_lhs > val_rhs:
-            yield env
+        return val_lhs > val_rhs
     except (ValueError, ZeroDivisionError, OverflowError):
-        return
+        return False
 
 
-def greater_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def greater_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """Predicado >=/2: X >= Y."""
     if len(args) != 2:
-        return
+        return False
     
     lhs, rhs = args
     
@@ -279,7 +322,6 @@ def greater_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) ->
         val_lhs = evaluate(lhs, env)
         val_rhs = evaluate(rhs, env)
         
-        if val_lhs >= val_rhs:
-            yield env
+        return val_lhs >= val_rhs
     except (ValueError, ZeroDivisionError, OverflowError):
-        return
+        return False
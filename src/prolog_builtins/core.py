@@ -2,99 +2,102 @@
 Predicados built-in del núcleo ISO para el motor Prolog.
 
 Implementa predicados fundamentales como true/0, fail/0, unificación y testing de tipos.
+
+Los predicados deterministas son funciones planas que devuelven bool: el
+engine las llama directo, sin el costo de crear un generador por goal.
 """
 
 from __future__ import annotations
 
 from typing import Any, Generator, List as PyList
 
-from core.types import Atom, Compound, Env, Number, Term, Variable
-from solver.unify import Trail, deref, unify
+from core.types import Atom, Compound, Env, Number, Term, Variable, is_ground
+from solver.unify import Trail, deref, unify, unify_ground
 
 
-def true_0(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def true_0(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """true/0 - Siempre tiene éxito."""
-    yield env
+    return True
 
 
-def fail_0(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
+def fail_0(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
     """fail/0 - Siempre falla."""
-    return
-    yield  # Nunca se ejecuta, pero hace que sea un generador
+    return False
 
 
-def equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """=/2 - Unificación de términos."""
-    if len(args) != 2:
-        return
-    
-    lhs, rhs = args
-    if unify(lhs, rhs, env, trail, engine.occurs_check if engine else False):
-        yield env
+def make_equal_2(occurs_check: bool = False) -> Any:
+    """Fabrica =/2 con el flag occurs_check capturado en el closure.
 
+    El flag se fija una vez al construir el engine; capturarlo aquí evita
+    la carga de atributo y el branch `engine.occurs_check if engine ...`
+    en cada llamada al builtin.
+    """
+    def equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
+        """=/2 - Unificación de términos."""
+        if len(args) != 2:
+            return False
 
-def not_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    r"""\=/2 - No unificación (falla si los términos se unifican)."""
-    if len(args) != 2:
-        return
-    
-    lhs, rhs = args
-    # Intentar unificar en un entorno temporal
-    temp_env = env.copy()
-    temp_trail = Trail()
-    
-    if not unify(lhs, rhs, temp_env, temp_trail, engine.occurs_check if engine else False):
-        yield env  # Éxito si NO se unifica
+        lhs, rhs = args
+        # Camino rápido: ambos lados ground -> igualdad estructural memoizada.
+        if is_ground(lhs) and is_ground(rhs):
+            return unify_ground(lhs, rhs)
 
+        return unify(lhs, rhs, env, trail, occurs_check)
 
-def var_1(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """var/1 - Verifica si el argumento es una variable no instanciada."""
-    if len(args) != 1:
-        return
-    
-    term = deref(args[0], env)
-    if isinstance(term, Variable):
-        yield env
+    return equal_2
 
 
-def nonvar_1(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """nonvar/1 - Verifica si el argumento NO es una variable no instanciada."""
-    if len(args) != 1:
-        return
-    
-    term = deref(args[0], env)
-    if not isinstance(term, Variable):
-        yield env
+def make_not_equal_2(occurs_check: bool = False) -> Any:
+    r"""Fabrica \=/2 con el flag occurs_check capturado en el closure."""
+    def not_equal_2(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
+        r"""\=/2 - No unificación (falla si los términos se unifican)."""
+        if len(args) != 2:
+            return False
 
+        lhs, rhs = args
+        # Camino rápido: ambos lados ground -> igualdad estructural memoizada.
+        if is_ground(lhs) and is_ground(rhs):
+            return not unify_ground(lhs, rhs)
 
-def atom_1(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """atom/1 - Verifica si el argumento es un átomo."""
-    if len(args) != 1:
-        return
-    
-    term = deref(args[0], env)
-    if isinstance(term, Atom):
-        yield env
+        # Intentar unificar sobre el env vivo y deshacer con el trail (patrón WAM):
+        # evita clonar todos los bindings en cada negación.
+        mark = len(trail)
+        ok = unify(lhs, rhs, env, trail, occurs_check)
+        trail.undo_to(mark, env)
 
+        return not ok  # Éxito si NO se unifica
 
-def number_1(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """number/1 - Verifica si el argumento es un número."""
-    if len(args) != 1:
-        return
-    
-    term = deref(args[0], env)
-    if isinstance(term, Number):
-        yield env
+    return not_equal_2
 
 
-def compound_1(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> Generator[Env, None, None]:
-    """compound/1 - Verifica si el argumento es un término compuesto."""
-    if len(args) != 1:
-        return
-    
-    term = deref(args[0], env)
-    if isinstance(term, Compound):
-        yield env
+# Instancias por defecto (sin occurs-check), para usos directos del módulo.
+equal_2 = make_equal_2()
+not_equal_2 = make_not_equal_2()
+
+
+def _make_type_check(cls: type, negate: bool = False, doc: str = "") -> Any:
+    """Fabrica un builtin de testing de tipos (var/1, atom/1, etc.).
+
+    Los cinco predicados de tipo son clones textuales que solo difieren en
+    la clase del isinstance; generarlos desde una tabla reduce el bytecode
+    duplicado y deja un único closure especializado por tipo.
+    """
+    def type_check(args: PyList[Term], engine: Any, env: Env, trail: Trail) -> bool:
+        if len(args) != 1:
+            return False
+
+        term = deref(args[0], env)
+        return isinstance(term, cls) != negate
+
+    type_check.__doc__ = doc
+    return type_check
+
+
+var_1 = _make_type_check(Variable, doc="var/1 - Verifica si el argumento es una variable no instanciada.")
+nonvar_1 = _make_type_check(Variable, negate=True, doc="nonvar/1 - Verifica si el argumento NO es una variable no instanciada.")
+atom_1 = _make_type_check(Atom, doc="atom/1 - Verifica si el argumento es un átomo.")
+number_1 = _make_type_check(Number, doc="number/1 - Verifica si el argumento es un número.")
+compound_1 = _make_type_check(Compound, doc="compound/1 - Verifica si el argumento es un término compuesto.")
 
 
 # TODO: PARA COMPAÑEROS DE GRUPO
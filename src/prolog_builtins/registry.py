@@ -15,11 +15,13 @@ from solver.unify import Trail
 
 # Tipo para implementaciones de builtins
 # Reciben: args (términos), engine, env, trail
-# Devuelven: Generator[Env, None, None] (como engine.query)
-BuiltinImpl = Callable[[PyList[Any], Any, Env, Trail], Generator[Env, None, None]]
+# - deterministic=True: función plana que devuelve bool (éxito/fallo); el
+#   engine la invoca directo, sin pagar creación de generador + StopIteration.
+# - deterministic=False: Generator[Env, None, None] (como engine.query)
+BuiltinImpl = Callable[[PyList[Any], Any, Env, Trail], Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class BuiltinInfo:
     """Información sobre un predicado built-in."""
     
@@ -31,7 +33,7 @@ class BuiltinInfo:
     description: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class BuiltinRegistry:
     """Registro central de predicados built-in."""
     
@@ -52,23 +54,31 @@ class BuiltinRegistry:
     
     def is_builtin(self, goal: Compound) -> bool:
         """Verifica si un goal es un predicado built-in."""
-        key = (goal.functor, goal.arity())
-        return key in self.builtins
-    
-    def call(self, 
-             goal: Compound, 
+        return goal._key in self.builtins
+
+    def lookup(self, goal: Compound) -> Optional[BuiltinInfo]:
+        """Devuelve la info del builtin para un goal, o None si no lo es."""
+        # goal._key es la tupla (functor, arity) precalculada en Compound
+        return self.builtins.get(goal._key)
+
+    def call(self,
+             goal: Compound,
              engine: Any,  # Evitar import circular
-             env: Env, 
+             env: Env,
              trail: Trail) -> Generator[Env, None, None]:
         """Invoca un predicado built-in."""
-        key = (goal.functor, goal.arity())
-        if key not in self.builtins:
+        builtin = self.builtins.get(goal._key)
+        if builtin is None:
             return  # No es builtin, no hacer nada
-        
-        builtin = self.builtins[key]
+
         args = list(goal.args)
-        
+
         # Llamar a la implementación
+        if builtin.deterministic:
+            # Camino rápido: función plana bool, a lo sumo una solución
+            if builtin.impl(args, engine, env, trail):
+                yield env
+            return
         yield from builtin.impl(args, engine, env, trail)
     
     def list_builtins(self) -> PyList[Tuple[str, int]]:
@@ -80,23 +90,27 @@ class BuiltinRegistry:
 GLOBAL_REGISTRY = BuiltinRegistry()
 
 
-def load_core_builtins(registry: BuiltinRegistry) -> None:
-    """Carga predicados del núcleo ISO."""
+def load_core_builtins(registry: BuiltinRegistry, occurs_check: bool = False) -> None:
+    """Carga predicados del núcleo ISO.
+
+    `occurs_check` se captura una vez en los closures de los builtins de
+    unificación, evitando la lectura de `engine.occurs_check` por llamada.
+    """
     from prolog_builtins.core import (
-        true_0, fail_0, equal_2, not_equal_2, 
+        true_0, fail_0, make_equal_2, make_not_equal_2,
         var_1, nonvar_1, atom_1, number_1, compound_1
     )
-    
+
     # Predicados de control básicos
-    registry.register("true", 0, true_0, deterministic=True, 
+    registry.register("true", 0, true_0, deterministic=True,
                      description="Siempre tiene éxito")
     registry.register("fail", 0, fail_0, deterministic=True,
                      description="Siempre falla")
-    
+
     # Predicados de unificación
-    registry.register("=", 2, equal_2, deterministic=True,
+    registry.register("=", 2, make_equal_2(occurs_check), deterministic=True,
                      description="Unificación de términos")
-    registry.register("\\=", 2, not_equal_2, deterministic=True,
+    registry.register("\\=", 2, make_not_equal_2(occurs_check), deterministic=True,
                      description="No unificación")
     
     # Predicados de testing de tipos
@@ -112,20 +126,20 @@ def load_core_builtins(registry: BuiltinRegistry) -> None:
                      description="Verifica si es término compuesto")
 
 
-def load_arithmetic_builtins(registry: BuiltinRegistry) -> None:
+def load_arithmetic_builtins(registry: BuiltinRegistry, occurs_check: bool = False) -> None:
     """Carga predicados aritméticos básicos."""
     from prolog_builtins.arith import (
-        is_2, 
-        arithmetic_equal_2, 
+        make_is_2,
+        arithmetic_equal_2,
         arithmetic_not_equal_2,
-        less_than_2, 
-        less_equal_2, 
-        greater_than_2, 
+        less_than_2,
+        less_equal_2,
+        greater_than_2,
         greater_equal_2
     )
-    
+
     # Evaluación aritmética
-    registry.register("is", 2, is_2, deterministic=True,
+    registry.register("is", 2, make_is_2(occurs_check), deterministic=True,
                      description="Evaluación aritmética X is Expr")
     
     # Comparaciones aritméticas
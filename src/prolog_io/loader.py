@@ -8,7 +8,7 @@ import os
 from typing import Iterable
 
 from core.errors import LoadError
-from core.types import Clause
+from core.types import Atom, Clause, Compound, Number, Term
 from parse.parser import parse_file
 from solver.engine import Engine
 
@@ -19,14 +19,43 @@ def resolve_path(base: str, relative: str) -> str:
 	return os.path.normpath(os.path.join(os.path.dirname(base), relative))
 
 
+def _handle_directive(goal: Term, engine: Engine, path: str) -> None:
+	"""Procesa una directiva ':- goal.' del archivo fuente.
+
+	Soportado: ':- table(f/n).' que habilita tabling para f/n.
+	"""
+	if isinstance(goal, Compound) and goal.functor == "table" and goal.arity == 1:
+		spec = goal.args[0]
+		if (
+			isinstance(spec, Compound)
+			and spec.functor == "/"
+			and spec.arity == 2
+			and isinstance(spec.args[0], Atom)
+			and isinstance(spec.args[1], Number)
+		):
+			engine.table(spec.args[0].name, int(spec.args[1].value))
+			return
+	raise LoadError(path, f"directiva no soportada: {goal}")
+
+
 def consult(path: str, engine: Engine) -> None:
 	if not os.path.exists(path):
 		raise LoadError(path, "archivo no encontrado")
 	try:
-		with open(path, "r", encoding="utf-8") as f:
-			text = f.read()
+		# Lectura binaria + decode explícito: evita la capa de traducción de
+		# saltos de línea del modo texto y decodifica el buffer de una vez.
+		with open(path, "rb") as f:
+			data = f.read()
+		text = data.decode("utf-8")
 	except OSError as e:
 		raise LoadError(path, str(e))
-	clauses = parse_file(text)
-	engine.load(clauses)
+	except UnicodeDecodeError as e:
+		raise LoadError(path, f"archivo no es UTF-8 válido: {e}")
+	# parse_file es un generador: cada cláusula se inserta en el engine al
+	# salir del parser, sin materializar la lista completa.
+	for clause in parse_file(text):
+		if clause.head.functor == ":-" and clause.head.arity == 1:
+			_handle_directive(clause.head.args[0], engine, path)
+		else:
+			engine.kb.add_clause(clause)
 
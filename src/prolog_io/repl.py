@@ -10,23 +10,65 @@ o bien varias metas separadas por coma:
 from __future__ import annotations
 
 import sys
-from typing import List as PyList, Set
+from typing import List as PyList, Tuple
 
 from core.types import Atom, Clause, Compound, Variable
 from parse.parser import Parser
 from solver.engine import Engine
-from utils.helpers import extract_variables, format_solution, pretty_term
+from utils.helpers import clear_pretty_cache, format_solution, pretty_term
 
 
-def _parse_query(text: str) -> PyList[Compound]:
-	"""Parsea una consulta del usuario."""
-	if not text.strip().endswith("."):
-		text = text.strip() + "."
+def _parse_query(text: str) -> Tuple[PyList[Compound], PyList[Variable]]:
+	"""Parsea una consulta del usuario.
+
+	Devuelve (goals, variables). Las variables salen del var_map del parser,
+	que ya las tiene en orden de aparición: no hace falta re-recorrer los
+	árboles de goals ni ordenar.
+	"""
+	text = text.strip()
+	if not text.endswith("."):
+		text += "."
+	# Parsear las metas directamente: antes se reparseaba el texto completo
+	# con el prefijo 'dummy :- ', duplicando el trabajo de lexer+parser.
 	p = Parser(text)
-	# Parsear como si fuera 'dummy :- goals.' y recuperar goals
-	p2 = Parser(f"dummy :- {text}")
-	clause = p2.parse_clause()
-	return list(clause.body)
+	goals = p.parse_goals()
+	p._expect(".")
+	return goals, list(p.var_map.values())
+
+
+def _cmd_help(engine: Engine) -> bool:
+	print("Comandos disponibles:")
+	print("  \\help     - Mostrar esta ayuda")
+	print("  \\quit     - Salir del REPL")
+	print("  \\listing  - Listar predicados cargados")
+	print("\nEjemplos de consultas:")
+	print("  ?- derivada(x^2, x, Y).")
+	print("  ?- derivada(sen(x), x, Y).")
+	return False
+
+
+def _cmd_quit(engine: Engine) -> bool:
+	return True
+
+
+def _cmd_listing(engine: Engine) -> bool:
+	predicates = engine.kb.list_predicates()
+	if predicates:
+		print("Predicados cargados:")
+		for pred in sorted(predicates):
+			print(f"  {pred}")
+	else:
+		print("No hay predicados cargados.")
+	return False
+
+
+# Dispatch de comandos del REPL: cada handler recibe el engine y devuelve
+# True si el REPL debe terminar.
+_COMMANDS = {
+	"\\help": _cmd_help,
+	"\\quit": _cmd_quit,
+	"\\listing": _cmd_listing,
+}
 
 
 def start(engine: Engine, prompt: str = "?- ") -> None:
@@ -48,41 +90,25 @@ def start(engine: Engine, prompt: str = "?- ") -> None:
 		
 		# Procesar comandos especiales
 		if s.startswith("\\"):
-			if s == "\\help":
-				print("Comandos disponibles:")
-				print("  \\help     - Mostrar esta ayuda")
-				print("  \\quit     - Salir del REPL")
-				print("  \\listing  - Listar predicados cargados")
-				print("\nEjemplos de consultas:")
-				print("  ?- derivada(x^2, x, Y).")
-				print("  ?- derivada(sen(x), x, Y).")
-			elif s == "\\quit":
-				break
-			elif s == "\\listing":
-				predicates = engine.kb.list_predicates()
-				if predicates:
-					print("Predicados cargados:")
-					for pred in sorted(predicates):
-						print(f"  {pred}")
-				else:
-					print("No hay predicados cargados.")
-			else:
+			handler = _COMMANDS.get(s)
+			if handler is None:
 				print("Comando desconocido. Use \\help para ver los comandos disponibles.")
+				continue
+			if handler(engine):
+				break
 			continue
 		
 		# Parsear y ejecutar consulta
 		try:
-			goals = _parse_query(s)
+			goals, query_vars = _parse_query(s)
 		except Exception as e:
 			print(f"Error de sintaxis: {e}")
 			continue
 		
-		# Extraer variables de la consulta original
-		query_vars: Set[Variable] = set()
-		for goal in goals:
-			query_vars.update(extract_variables(goal))
-		
-		# Ejecutar consulta
+		# Ejecutar consulta. El caché de renders vive por consulta: los
+		# subtérminos ground compartidos entre soluciones se formatean una
+		# vez, sin retener términos de consultas anteriores.
+		clear_pretty_cache()
 		solution_count = 0
 		try:
 			for env in engine.query(goals):
@@ -90,9 +116,9 @@ def start(engine: Engine, prompt: str = "?- ") -> None:
 				
 				# Mostrar la solución
 				if query_vars:
-					# Mostrar bindings de variables
+					# Mostrar bindings en orden de aparición en la consulta
 					bindings = []
-					for var in sorted(query_vars, key=lambda v: v.name):
+					for var in query_vars:
 						# Obtener el valor de la variable del entorno
 						value_term = env.get(var)
 						if value_term is not None:
@@ -0,0 +1,177 @@
+"""
+Especialización de cabezas de cláusula en closures de matching.
+
+En vez de renombrar la cabeza completa y pasarla por `unify` genérico en
+cada activación, cada cláusula se "compila" una sola vez en consult():
+por argumento de la cabeza se emite un closure especializado (constante,
+variable, término ground o término genérico), al estilo de las
+instrucciones get_*/unify_* de la WAM. El matcher comparte el mapa de
+renombrado con el cuerpo, así las variables de la cláusula se crean solo
+cuando hacen falta.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List as PyList, Sequence, Tuple
+
+from core.types import Atom, Compound, Env, Number, PList, Term, Variable, is_ground
+from solver.unify import Trail, bind, deref, unify, unify_ground
+from utils.helpers import fresh_var
+
+
+# Matcher de un argumento: (arg_goal, env, trail, var_map, occurs_check) -> bool
+ArgMatcher = Callable[[Term, Env, Trail, Dict[int, Variable], bool], bool]
+
+# Matcher de cabeza completa: (args_goal, env, trail, var_map, occurs_check) -> bool
+HeadMatcher = Callable[[Sequence[Term], Env, Trail, Dict[int, Variable], bool], bool]
+
+# Builder de término renombrado: var_map -> término fresco
+TermBuilder = Callable[[Dict[int, Variable]], Term]
+
+# Builder de cuerpo completo: var_map -> lista de goals renombrados
+BodyBuilder = Callable[[Dict[int, Variable]], PyList[Term]]
+
+
+def _compile_arg(arg: Term) -> ArgMatcher:
+	"""Emite el closure especializado para un argumento de la cabeza."""
+
+	if isinstance(arg, Atom):
+		# Constante interned: el match es identidad de objeto.
+		def match_atom(g: Term, env: Env, trail: Trail, var_map: Dict[int, Variable], occurs: bool) -> bool:
+			g = deref(g, env)
+			if isinstance(g, Variable):
+				bind(g, arg, env, trail)
+				return True
+			return g is arg
+
+		return match_atom
+
+	if isinstance(arg, Number):
+		def match_number(g: Term, env: Env, trail: Trail, var_map: Dict[int, Variable], occurs: bool) -> bool:
+			g = deref(g, env)
+			if isinstance(g, Variable):
+				bind(g, arg, env, trail)
+				return True
+			return isinstance(g, Number) and g.value == arg.value
+
+		return match_number
+
+	if isinstance(arg, Variable):
+		vid = arg.id
+		name = arg.name
+
+		def match_var(g: Term, env: Env, trail: Trail, var_map: Dict[int, Variable], occurs: bool) -> bool:
+			fv = var_map.get(vid)
+			if fv is None:
+				# Primera aparición: la variable fresca toma el argumento
+				# del goal directamente, sin pasar por unify.
+				fv = fresh_var(name)
+				var_map[vid] = fv
+				bind(fv, deref(g, env), env, trail)
+				return True
+			return unify(fv, g, env, trail, occurs)
+
+		return match_var
+
+	if is_ground(arg):
+		# Término compuesto sin variables: no necesita renombrado y el caso
+		# goal-ground se resuelve por igualdad estructural memoizada.
+		def match_ground(g: Term, env: Env, trail: Trail, var_map: Dict[int, Variable], occurs: bool) -> bool:
+			g = deref(g, env)
+			if isinstance(g, Variable):
+				bind(g, arg, env, trail)
+				return True
+			if is_ground(g):
+				return unify_ground(arg, g)
+			return unify(arg, g, env, trail, occurs)
+
+		return match_ground
+
+	# Término compuesto con variables: instanciar con el builder compilado
+	# (comparte var_map con el cuerpo, como los cuerpos mismos) y caer en la
+	# unificación genérica. El builder evita el walk de rename_variables por
+	# activación y sus frames extra en plena recursión SLD.
+	build = _compile_term(arg)
+
+	def match_generic(g: Term, env: Env, trail: Trail, var_map: Dict[int, Variable], occurs: bool) -> bool:
+		return unify(build(var_map), g, env, trail, occurs)
+
+	return match_generic
+
+
+def compile_head(head: Compound) -> HeadMatcher:
+	"""Compila la cabeza de una cláusula en un matcher especializado."""
+	matchers: Tuple[ArgMatcher, ...] = tuple(_compile_arg(a) for a in head.args)
+
+	def match(goal_args: Sequence[Term], env: Env, trail: Trail, var_map: Dict[int, Variable], occurs_check: bool = False) -> bool:
+		for m, g in zip(matchers, goal_args):
+			if not m(g, env, trail, var_map, occurs_check):
+				return False
+		return True
+
+	return match
+
+
+def _compile_term(term: Term) -> TermBuilder:
+	"""Emite el builder que reconstruye `term` con variables renombradas."""
+
+	if is_ground(term):
+		# Subtérmino sin variables: se comparte tal cual, sin copiar.
+		def build_ground(var_map: Dict[int, Variable], _t: Term = term) -> Term:
+			return _t
+
+		return build_ground
+
+	if isinstance(term, Variable):
+		vid = term.id
+		name = term.name
+
+		def build_var(var_map: Dict[int, Variable]) -> Term:
+			fv = var_map.get(vid)
+			if fv is None:
+				fv = var_map[vid] = fresh_var(name)
+			return fv
+
+		return build_var
+
+	if isinstance(term, PList):
+		item_builders = tuple(map(_compile_term, term.items))
+
+		def build_plist(var_map: Dict[int, Variable]) -> Term:
+			return PList(tuple(b(var_map) for b in item_builders))
+
+		return build_plist
+
+	# Compound con variables
+	functor = term.functor
+	arg_builders = tuple(map(_compile_term, term.args))
+
+	def build_compound(var_map: Dict[int, Variable]) -> Term:
+		return Compound(functor, tuple(b(var_map) for b in arg_builders))
+
+	return build_compound
+
+
+def compile_term(term: Term) -> TermBuilder:
+	"""Builder reusable que instancia `term` con variables frescas.
+
+	Útil para términos renombrados repetidamente fuera de cláusulas (p. ej.
+	las respuestas memoizadas del tabling): se paga el walk una vez y cada
+	instancia posterior son solo llamadas a closures.
+	"""
+	return _compile_term(term)
+
+
+def compile_body(body: Sequence[Term]) -> BodyBuilder:
+	"""Compila el cuerpo de una cláusula en un builder de goals frescos.
+
+	La plantilla se recorre una sola vez en consult(); cada activación de la
+	cláusula solo invoca los closures, que comparten los subtérminos ground y
+	crean variables frescas vía el mismo var_map que el matcher de la cabeza.
+	"""
+	goal_builders = tuple(map(_compile_term, body))
+
+	def build(var_map: Dict[int, Variable]) -> PyList[Term]:
+		return [b(var_map) for b in goal_builders]
+
+	return build
@@ -5,65 +5,205 @@ Motor de resolución SLD básico con backtracking.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, Generator, Iterable, List as PyList, Optional, Tuple
+from typing import Dict, Generator, Iterable, List as PyList, Optional, Set, Tuple
 
-from core.types import Atom, Clause, Compound, Env, Term, Variable
+from core.types import Atom, Clause, Compound, Env, Number, Term, Variable
+from prolog_builtins.registry import GLOBAL_REGISTRY
 from solver.indexer import KnowledgeBase
+from solver.compile import compile_term
 from solver.unify import Trail, apply, deref, unify
 
 
-@dataclass
+# Marcador de variante en curso en la tabla (evita recursión infinita del memo)
+_IN_PROGRESS = object()
+
+# Lista de goals pendientes como cadena de cons inmutable: None es la lista
+# vacía y cada nodo es la tupla (goal, resto). Tomar el resto no copia nada
+# (antes goals[1:] asignaba una lista por paso) y empujar el cuerpo de una
+# cláusula cuesta un nodo por goal, compartiendo el resto entre ramas.
+GoalStack = Optional[Tuple[Compound, "GoalStack"]]
+
+
+def _push_goals(body: PyList[Compound], rest: "GoalStack") -> "GoalStack":
+	"""Apila los goals de `body` (en orden) sobre `rest`."""
+	for goal in reversed(body):
+		rest = (goal, rest)
+	return rest
+
+
+def _canonical_key(term: Term, mapping: Dict[int, Term]) -> Term:
+	"""Canonicaliza las variables de un goal para usarlo como clave de tabla.
+
+	Cada variable distinta se numera como '$VAR'(n), así dos goals variantes
+	(iguales salvo renombrado) comparten entrada en la tabla.
+	"""
+	if isinstance(term, Variable):
+		key = mapping.get(term.id)
+		if key is None:
+			key = Compound("$VAR", (Number(len(mapping)),))
+			mapping[term.id] = key
+		return key
+	if isinstance(term, Compound):
+		return Compound(term.functor, tuple(_canonical_key(a, mapping) for a in term.args))
+	return term
+
+
+@dataclass(slots=True)
 class Engine:
 	occurs_check: bool = False
 	kb: KnowledgeBase = field(default_factory=KnowledgeBase)
+	# Predicados con tabling habilitado (directiva ':- table f/n.') y su
+	# caché de respuestas: goal canónico -> lista de instancias resueltas.
+	tabled: Set[Tuple[str, int]] = field(default_factory=set)
+	_table: Dict[Term, object] = field(default_factory=dict)
 
 	def reset(self) -> None:
 		self.kb = KnowledgeBase()
+		self._table = {}
 
 	def load(self, clauses: Iterable[Clause]) -> None:
 		for c in clauses:
 			self.kb.add_clause(c)
 
+	def table(self, functor: str, arity: int) -> None:
+		"""Habilita memoización de respuestas para el predicado functor/arity."""
+		self.tabled.add((functor, arity))
+
 	def query(self, goals: Iterable[Compound]) -> Generator[Env, None, None]:
-		goals_list = list(goals)
 		env = Env()
 		trail = Trail()
-		yield from self._solve(goals_list, env, trail)
+		yield from self._solve(_push_goals(list(goals), None), env, trail)
 
-	def _solve(self, goals: PyList[Compound], env: Env, trail: Trail) -> Generator[Env, None, None]:
-		if not goals:
-			# solución encontrada
-			yield env.copy()
-			return
+	def _solve(self, goals: GoalStack, env: Env, trail: Trail, _reg=GLOBAL_REGISTRY) -> Generator[Env, None, None]:
+		# Bucle SLD iterativo: los pasos deterministas (builtin determinista,
+		# predicado con una sola cláusula candidata) avanzan en este mismo
+		# frame reasignando `goals`; solo se recursa cuando hay ramificación
+		# real (varias cláusulas, builtin no determinista, tabling). Así una
+		# conjunción/cola determinista de largo N no apila N frames.
+		while True:
+			if goals is None:
+				# solución encontrada
+				yield env.copy()
+				return
+
+			# Selección izquierda por defecto (el resto se comparte, sin copia)
+			first, rest = goals
 
-		# Selección izquierda por defecto
-		first, rest = goals[0], goals[1:]
+			# Verificar si es un builtin primero (_reg ligado como default para
+			# resolver por LOAD_FAST, sin lookup de global por goal)
+			builtin = _reg.lookup(first)
+			if builtin is not None:
+				if builtin.deterministic:
+					# Camino rápido: función plana bool, sin crear un generador
+					if not builtin.impl(list(first.args), self, env, trail):
+						return
+					goals = rest
+					continue
+				# Builtin no determinista: protocolo de generador
+				for result_env in builtin.impl(list(first.args), self, env, trail):
+					# Continuar con el resto de goals
+					yield from self._solve(rest, result_env, trail)
+				return
 
-		# Verificar si es un builtin primero
-		from prolog_builtins.registry import GLOBAL_REGISTRY
-		if GLOBAL_REGISTRY.is_builtin(first):
-			# Ejecutar builtin
-			for result_env in GLOBAL_REGISTRY.call(first, self, env, trail):
-				# Continuar con el resto de goals
-				yield from self._solve(rest, result_env, trail)
+			# Predicado con tabling: reproducir/registrar respuestas memoizadas
+			if first._key in self.tabled:
+				yield from self._solve_tabled(first, rest, env, trail)
+				return
+
+			candidates = self.kb.get_candidates(first)
+			if len(candidates) == 1:
+				# Paso determinista: una sola cláusula posible, sin choicepoint
+				clause = candidates[0]
+				mark = len(trail)
+				var_map: Dict[int, Variable] = {}
+				matcher = self.kb.matcher_for(clause)
+				if not matcher(first.args, env, trail, var_map, self.occurs_check):
+					trail.undo_to(mark, env)
+					return
+				goals = _push_goals(self.kb.body_for(clause)(var_map), rest)
+				continue
+
+			# Ramificación real: bucle de candidatos inline (no delegado a
+			# _resolve_goal) para que cada paso de resolución cueste un solo
+			# frame de generador; con dos frames por goal no determinista la
+			# profundidad Prolog alcanzable se reduce a la mitad.
+			for clause in candidates:
+				# Truco WAM: env compartido con marca de trail por rama, en
+				# vez de copiar el env completo por candidato; al agotar la
+				# rama se deshacen los bindings posteriores a la marca.
+				mark = len(trail)
+				var_map = {}
+				matcher = self.kb.matcher_for(clause)
+				if matcher(first.args, env, trail, var_map, self.occurs_check):
+					new_goals = _push_goals(self.kb.body_for(clause)(var_map), rest)
+					yield from self._solve(new_goals, env, trail)
+				trail.undo_to(mark, env)
 			return
 
-		# Buscar cláusulas candidatas en la base de conocimiento
-		for clause in self.kb.get_candidates(first):
-			# Renombrar variables de la cláusula para evitar conflictos
-			from utils.helpers import rename_variables
+	def _resolve_goal(self, first: Compound, rest: GoalStack, env: Env, trail: Trail, candidates: Optional[PyList[Clause]] = None) -> Generator[Env, None, None]:
+		"""Resolución SLD contra las cláusulas de la KB (camino de tabling)."""
+		if candidates is None:
+			candidates = self.kb.get_candidates(first)
+
+		for clause in candidates:
+			# Truco WAM: env compartido con marca de trail por rama, en vez de
+			# copiar el env completo por candidato; al agotar la rama se
+			# deshacen solo los bindings registrados después de la marca.
+			mark = len(trail)
+			# Matching con la cabeza compilada (solver/compile.py): el mapa de
+			# renombrado se comparte con el cuerpo, así solo se renombra la
+			# cabeza cuando un argumento lo exige y el cuerpo si hubo match.
 			var_map: Dict[int, Variable] = {}
-			renamed_head = rename_variables(clause.head, var_map)
-			renamed_body = [rename_variables(goal, var_map) for goal in clause.body]
-			
-			# Preparar nuevo entorno y trail para esta rama
-			local_env = env.copy()
-			local_trail = Trail()
-			# Unificar cabeza renombrada con goal
-			if unify(first, renamed_head, local_env, local_trail, self.occurs_check):
-				# Nueva lista de metas: cuerpo renombrado + resto
-				new_goals = renamed_body + rest
+			matcher = self.kb.matcher_for(clause)
+			if matcher(first.args, env, trail, var_map, self.occurs_check):
+				# Metas nuevas: cuerpo renombrado (builder compilado en
+				# consult, ver solver/compile.py) apilado sobre el resto
+				new_goals = _push_goals(self.kb.body_for(clause)(var_map), rest)
 				# Resolver recursivamente
-				yield from self._solve(new_goals, local_env, local_trail)
-			# Si falla, se descartan bindings locales por el Trail de la rama
+				yield from self._solve(new_goals, env, trail)
+			trail.undo_to(mark, env)
+
+	def _solve_tabled(self, first: Compound, rest: GoalStack, env: Env, trail: Trail) -> Generator[Env, None, None]:
+		"""Memoización de respuestas (tabling simple, sin SLG completo).
+
+		La primera resolución de una variante del goal registra todas sus
+		respuestas; las siguientes las reproducen sin repetir la búsqueda.
+		Las variantes re-entrantes (el mismo goal dentro de su propio
+		cómputo) caen a resolución directa para no ciclar sobre la tabla.
+		"""
+		goal = apply(env, first)
+		# Goal totalmente ground: es su propia clave canónica (no hay
+		# variables que numerar) y el chequeo _ground es O(1).
+		ground = goal._ground
+		key = goal if ground else _canonical_key(goal, {})
+		answers = self._table.get(key)
+
+		if answers is _IN_PROGRESS:
+			# Variante en curso: resolver directo, sin memo
+			yield from self._resolve_goal(first, rest, env, trail)
+			return
+
+		if answers is None:
+			self._table[key] = _IN_PROGRESS
+			# Cada respuesta se guarda como template compilado: el replay la
+			# instancia con closures, sin re-walk de rename_variables.
+			collected: PyList[Term] = []
+			for sol_env in self._resolve_goal(goal, None, env.copy(), Trail()):
+				collected.append(compile_term(apply(sol_env, goal)))
+			self._table[key] = answers = collected
+
+		if ground:
+			# Replay de un goal ground: cada respuesta es el goal mismo, así
+			# que equivale a n éxitos sin renombrar ni unificar nada.
+			for _ in answers:
+				yield from self._solve(rest, env, trail)
+			return
 
+		for build in answers:
+			# Instanciar la respuesta con variables frescas (no se comparten
+			# variables entre ramas)
+			renamed = build({})
+			mark = len(trail)
+			if unify(first, renamed, env, trail, self.occurs_check):
+				yield from self._solve(rest, env, trail)
+			trail.undo_to(mark, env)
@@ -4,15 +4,27 @@ Indexación y almacenamiento de cláusulas.
 
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import DefaultDict, Dict, Iterable, List as PyList, Tuple
+from typing import Callable, Dict, Iterable, List as PyList, Tuple
 
-from core.types import Atom, Clause, Compound, Term
+from core.types import Atom, Clause, Compound, PList, Term
 
 
 PredKey = Tuple[str, int]
 
+# Clave comodín: el argumento no discrimina (variable, número, sin argumento)
+_WILD = ("*", "_")
+
+
+def _arg_key(a: "Term") -> Tuple[str, str]:
+	"""Clave gruesa de indexación para un argumento (estilo switch_on_term)."""
+	if isinstance(a, (Compound, PList)):
+		return (".", "_")
+	if isinstance(a, Atom):
+		return ("a", a.name)
+	# número, variable u otro -> comodín
+	return _WILD
+
 
 def _first_arg_key(head: Compound) -> Tuple[str, str]:
 	"""Devuelve una clave simple para indexar por primer argumento.
@@ -21,52 +33,117 @@ def _first_arg_key(head: Compound) -> Tuple[str, str]:
 	- Si no: comodín '_'.
 	"""
 	if head.args:
-		a0 = head.args[0]
-		if isinstance(a0, Compound):
-			return (".", "_")
-		if isinstance(a0, Atom):
-			return ("a", a0.name)
-		# número, variable u otro -> comodín
-	return ("*", "_")
+		return _arg_key(head.args[0])
+	return _WILD
+
+
+def _second_arg_key(head: Compound) -> Tuple[str, str]:
+	"""Clave del segundo argumento (comodín si la aridad es < 2)."""
+	if len(head.args) >= 2:
+		return _arg_key(head.args[1])
+	return _WILD
 
 
-@dataclass
+@dataclass(slots=True)
 class Index:
-	by_key: DefaultDict[Tuple[str, str], PyList[Clause]] = field(default_factory=lambda: defaultdict(list))
+	# Buckets de pares (seq, cláusula), donde seq es la posición en orden de
+	# programa: al mezclar buckets disjuntos (específico + comodín) basta
+	# ordenar por seq para restaurar el orden estándar de selección de
+	# cláusulas de Prolog. Dicts planos en lugar de defaultdict: el camino
+	# de inserción evita el par __missing__ + factory-lambda por clave nueva.
+	by_key: Dict[Tuple[str, str], PyList[Tuple[int, Clause]]] = field(default_factory=dict)
+	# Segundo nivel de dispatch (switch_on_term de la WAM): dentro de una
+	# clave concreta de primer argumento, sub-buckets por clave del segundo.
+	by_key2: Dict[Tuple[Tuple[str, str], Tuple[str, str]], PyList[Tuple[int, Clause]]] = field(
+		default_factory=dict)
+	# Todas las cláusulas en orden de programa (para goals con comodín).
+	_flat_all: PyList[Clause] = field(default_factory=list)
+	_wild: PyList[Tuple[int, Clause]] = field(default_factory=list)
+	# Mezclas ya resueltas por clave de goal: candidates sigue devolviendo
+	# listas prefabricadas (el sort por seq se paga una vez por clave y se
+	# invalida al cargar cláusulas nuevas, no por goal).
+	_merged: Dict[Tuple[Tuple[str, str], Tuple[str, str]], PyList[Clause]] = field(
+		default_factory=dict)
 
 	def add(self, clause: Clause) -> None:
+		entry = (len(self._flat_all), clause)
 		k = _first_arg_key(clause.head)
-		self.by_key[k].append(clause)
-
-	def candidates(self, head: Compound) -> Iterable[Clause]:
-		# devolver por clave concreta + comodín para cobertura
+		bucket = self.by_key.get(k)
+		if bucket is None:
+			bucket = self.by_key[k] = []
+		bucket.append(entry)
+		k2 = (k, _second_arg_key(clause.head))
+		bucket2 = self.by_key2.get(k2)
+		if bucket2 is None:
+			bucket2 = self.by_key2[k2] = []
+		bucket2.append(entry)
+		self._flat_all.append(clause)
+		if k == _WILD:
+			self._wild.append(entry)
+		self._merged.clear()
+
+	def candidates(self, head: Compound) -> PyList[Clause]:
 		k = _first_arg_key(head)
-		
+
 		# Si el goal tiene una variable en el primer argumento, puede matchear
-		# con cualquier cláusula, entonces devolver todas
-		if k == ("*", "_"):
-			for clauses in self.by_key.values():
-				for c in clauses:
-					yield c
+		# con cualquier cláusula: devolver todas (en orden de programa)
+		if k == _WILD:
+			return self._flat_all
+
+		k2 = _second_arg_key(head)
+		key = (k, k2)
+		merged = self._merged.get(key)
+		if merged is not None:
+			return merged
+
+		if k2 != _WILD:
+			# Goal con segundo argumento concreto: sub-buckets que pueden
+			# matchear (clave exacta + comodín de segundo nivel) más las
+			# cláusulas con primer argumento comodín.
+			pairs = self.by_key2.get(key, []) + self.by_key2.get((k, _WILD), []) + self._wild
 		else:
-			# Devolver cláusulas con clave específica + cláusulas comodín
-			for c in self.by_key.get(k, []):
-				yield c
-			for c in self.by_key.get(("*", "_"), []):
-				yield c
+			# Cláusulas con clave específica + cláusulas comodín
+			pairs = self.by_key.get(k, []) + self._wild
+		# Re-mezclar en orden de programa: los seq son únicos, así que el
+		# sort nunca compara cláusulas entre sí.
+		pairs.sort()
+		merged = [clause for _, clause in pairs]
+		self._merged[key] = merged
+		return merged
 
 
-@dataclass
+@dataclass(slots=True)
 class KnowledgeBase:
-	clauses: DefaultDict[PredKey, PyList[Clause]] = field(default_factory=lambda: defaultdict(list))
+	clauses: Dict[PredKey, PyList[Clause]] = field(default_factory=dict)
 	indices: Dict[PredKey, Index] = field(default_factory=dict)
+	# Matchers de cabeza y builders de cuerpo compilados en add_clause
+	# (ver solver/compile.py)
+	matchers: Dict[Clause, "HeadMatcher"] = field(default_factory=dict)
+	bodies: Dict[Clause, "BodyBuilder"] = field(default_factory=dict)
+	# Método candidates ya ligado por predicado: get_candidates resuelve con
+	# un lookup + llamada directa, sin buscar el atributo .candidates del
+	# índice en cada goal.
+	_cand_fns: Dict[PredKey, "Callable[[Compound], PyList[Clause]]"] = field(default_factory=dict)
 
 	def add_clause(self, clause: Clause) -> None:
-		key = (clause.head.functor, clause.head.arity())
-		self.clauses[key].append(clause)
-		if key not in self.indices:
-			self.indices[key] = Index()
+		from solver.compile import compile_body, compile_head
+		key = (clause.head.functor, clause.head.arity)
+		bucket = self.clauses.get(key)
+		if bucket is None:
+			# Predicado nuevo: registrar bucket, índice y dispatch de una vez
+			bucket = self.clauses[key] = []
+			index = self.indices[key] = Index()
+			self._cand_fns[key] = index.candidates
+		bucket.append(clause)
 		self.indices[key].add(clause)
+		self.matchers[clause] = compile_head(clause.head)
+		self.bodies[clause] = compile_body(clause.body)
+
+	def matcher_for(self, clause: Clause) -> "HeadMatcher":
+		return self.matchers[clause]
+
+	def body_for(self, clause: Clause) -> "BodyBuilder":
+		return self.bodies[clause]
 
 	def predicates(self) -> Iterable[PredKey]:
 		return self.clauses.keys()
@@ -78,10 +155,9 @@ class KnowledgeBase:
 			result.append(f"{functor}/{arity}")
 		return result
 
-	def get_candidates(self, goal: Compound) -> Iterable[Clause]:
-		key = (goal.functor, goal.arity())
-		idx = self.indices.get(key)
-		if not idx:
+	def get_candidates(self, goal: Compound) -> PyList[Clause]:
+		fn = self._cand_fns.get(goal._key)
+		if fn is None:
 			return []
-		return idx.candidates(goal)
+		return fn(goal)
 
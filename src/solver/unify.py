@@ -4,92 +4,253 @@ Unificación de términos para el motor Prolog.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List as PyList
+from functools import lru_cache
+from typing import List as PyList, Optional, Tuple
 
-from core.types import Atom, Compound, Env, Number, Term, Variable
+from core.types import (KIND_ATOM, KIND_COMP, KIND_LIST, KIND_NUM, KIND_VAR,
+                        Atom, Compound, Env, Number, PList, Term, Variable,
+                        _compound_pool)
 
 
-@dataclass
-class Trail:
-	"""Pila de variables enlazadas para poder deshacer en backtracking."""
+class Trail(list):
+	"""Pila de bindings para deshacer en backtracking.
 
-	stack: PyList[int]
+	Subclase directa de list: registrar un binding es trail.append(id) y
+	marcar es len(trail), sin el método-wrapper por operación que pagaba la
+	versión dataclass. Cada entrada es un id de variable (undo = desligar) o
+	una tupla (id, viejo) de la compresión de caminos (undo = restaurar).
+	"""
 
-	def __init__(self) -> None:
-		self.stack = []
+	__slots__ = ()
 
-	def push(self, var: Variable) -> None:
-		self.stack.append(var.id)
+	def undo_to(self, mark: int, env: Env) -> None:
+		"""Deshace los bindings registrados después de `mark`."""
+		pop = self.pop
+		bindings = env.bindings
+		bpop = bindings.pop
+		while len(self) > mark:
+			entry = pop()
+			if type(entry) is tuple:
+				# Compresión de caminos: restaurar el binding anterior
+				bindings[entry[0]] = entry[1]
+			else:
+				bpop(entry, None)
 
 	def unwind(self, env: Env) -> None:
-		while self.stack:
-			vid = self.stack.pop()
-			if vid in env.bindings:
-				del env.bindings[vid]
+		self.undo_to(0, env)
 
 
-def deref(term: Term, env: Env) -> Term:
-	while isinstance(term, Variable):
-		bound = env.get(term)
+def deref(term: Term, env: Env, trail: Optional[Trail] = None) -> Term:
+	t = term
+	# Alias local del get del dict de bindings: el bucle caliente resuelve
+	# por LOAD_FAST y una llamada en C, sin método env.get por salto.
+	bget = env.bindings.get
+	while t.KIND == KIND_VAR:
+		bound = bget(t.id)
 		if bound is None:
-			return term
-		term = bound
-	return term
+			break
+		t = bound
+	# Compresión de caminos (union-find): con trail disponible, las variables
+	# intermedias de cadenas largas se reapuntan directo a la raíz, dejando
+	# los siguientes deref de esas variables en O(1). Cada reescritura se
+	# registra en el trail para que el backtracking restaure la cadena.
+	if trail is not None and t is not term:
+		v = term
+		while True:
+			bound = env.get(v)
+			if bound is t or bound.KIND != KIND_VAR:
+				break
+			trail.append((v.id, bound))
+			env.set(v, t)
+			v = bound
+	return t
 
 
 def occurs_in(v: Variable, t: Term, env: Env) -> bool:
-	t = deref(t, env)
-	if isinstance(t, Variable):
-		return v.id == t.id
-	if isinstance(t, Compound):
-		return any(occurs_in(v, a, env) for a in t.args)
+	# Worklist iterativa (mismo esquema que unify): sin frame por subtérmino.
+	vid = v.id
+	pending: PyList[Term] = [t]
+	while pending:
+		t = deref(pending.pop(), env)
+		k = t.KIND
+		if k == KIND_VAR:
+			if vid == t.id:
+				return True
+		elif k == KIND_COMP:
+			# Subtérmino ground (flag O(1) de construcción): ninguna variable
+			# puede aparecer dentro, no hay nada que recorrer.
+			if not t._ground:
+				pending.extend(t.args)
+		elif k == KIND_LIST:
+			pending.extend(t.items)
 	return False
 
 
 def bind(var: Variable, value: Term, env: Env, trail: Trail) -> None:
-	trail.push(var)
+	trail.append(var.id)
 	env.set(var, value)
 
 
+@lru_cache(maxsize=4096)
+def unify_ground(a: Term, b: Term) -> bool:
+	"""Unificación de dos términos ground, memoizada.
+
+	Sin variables libres la unificación no toca el env ni el trail: se reduce
+	a igualdad estructural, y el resultado para un par (a, b) es estable, así
+	que lo cacheamos para evitar recorridos repetidos del término completo.
+	"""
+	return a == b
+
+
 def unify(t1: Term, t2: Term, env: Env, trail: Trail, occurs_check: bool = False) -> bool:
-	t1 = deref(t1, env)
-	t2 = deref(t2, env)
+	# Worklist iterativa de pares pendientes en lugar de recursión: sin frame
+	# de Python por nodo del término y sin límite de profundidad. El orden de
+	# procesamiento no afecta el resultado (la unificación es confluente) y el
+	# trail cubre el undo de los bindings parciales si algún par falla.
+	pairs: PyList[Tuple[Term, Term]] = [(t1, t2)]
+	# Constantes de tag como locales: LOAD_FAST en vez de LOAD_GLOBAL por vuelta
+	kvar, katom, knum, kcomp, klist = KIND_VAR, KIND_ATOM, KIND_NUM, KIND_COMP, KIND_LIST
+	get = env.get
+	push = trail.append
+	while pairs:
+		a, b = pairs.pop()
+		# Deref inline de un paso: las cadenas de largo <= 1 dominan y así se
+		# evita una llamada a deref por lado del par; las cadenas más largas
+		# caen al deref completo (que además comprime caminos vía el trail).
+		if a.KIND == kvar:
+			t = get(a)
+			if t is not None:
+				a = t if t.KIND != kvar else deref(t, env, trail)
+		if b.KIND == kvar:
+			t = get(b)
+			if t is not None:
+				b = t if t.KIND != kvar else deref(t, env, trail)
 
-	if isinstance(t1, Variable):
-		if isinstance(t2, Variable) and t1.id == t2.id:
-			return True
-		if occurs_check and occurs_in(t1, t2, env):
-			return False
-		bind(t1, t2, env, trail)
-		return True
+		if a is b:
+			# Misma instancia: átomos interned, variables idénticas, términos
+			# compartidos por los builders; nada que hacer.
+			continue
 
-	if isinstance(t2, Variable):
-		if occurs_check and occurs_in(t2, t1, env):
-			return False
-		bind(t2, t1, env, trail)
-		return True
+		ka = a.KIND
+		kb = b.KIND
 
-	if isinstance(t1, Atom) and isinstance(t2, Atom):
-		return t1.name == t2.name
+		# Listas compactas: PList vs PList se unifica elemento a elemento sin
+		# materializar celdas cons; en cualquier otro cruce se expande a '.'/2.
+		if ka == klist:
+			if kb == klist:
+				if len(a.items) != len(b.items):
+					return False
+				pairs.extend(zip(a.items, b.items))
+				continue
+			a = a.as_cons()
+			ka = a.KIND
+		elif kb == klist:
+			b = b.as_cons()
+			kb = b.KIND
 
-	if isinstance(t1, Number) and isinstance(t2, Number):
-		return t1.value == t2.value
+		if ka == kvar:
+			if kb == kvar and a.id == b.id:
+				continue
+			# Una variable sin referencias (recién creada) no puede aparecer
+			# dentro de b: el occurs-check se puede saltar sin riesgo.
+			if occurs_check and a.ref_count and occurs_in(a, b, env):
+				return False
+			# bind() inline: una llamada menos por binding en el bucle interno
+			push(a.id)
+			env.set(a, b)
+			continue
+
+		if kb == kvar:
+			if occurs_check and b.ref_count and occurs_in(b, a, env):
+				return False
+			push(b.id)
+			env.set(b, a)
+			continue
 
-	if isinstance(t1, Compound) and isinstance(t2, Compound):
-		if t1.functor != t2.functor or len(t1.args) != len(t2.args):
+		if ka != kb:
 			return False
-		for a, b in zip(t1.args, t2.args):
-			if not unify(a, b, env, trail, occurs_check):
+
+		if ka == katom:
+			# Átomos interned: si no son la misma instancia (atajo 'a is b' de
+			# arriba), los nombres difieren; el == corta por identidad igual.
+			if a.name == b.name:
+				continue
+			return False
+
+		if ka == knum:
+			if a.value == b.value:
+				continue
+			return False
+
+		if ka == kcomp:
+			if a.functor != b.functor or len(a.args) != len(b.args):
 				return False
-		return True
+			pairs.extend(zip(a.args, b.args))
+			continue
 
-	return False
+		return False
+
+	return True
 
 
 def apply(env: Env, term: Term) -> Term:
-	term = deref(term, env)
-	if isinstance(term, Compound):
-		return Compound(term.functor, tuple(apply(env, a) for a in term.args))
-	return term
+	# Post-orden iterativo con sharing estructural: un subtérmino ground (flag
+	# O(1)) o cuyos hijos no cambiaron se devuelve tal cual, sin clonar; solo
+	# se reconstruyen los nodos por encima de algún binding aplicado. Sin
+	# recursión: pila de trabajo (nodo, stage) + pila de resultados, como el
+	# evaluador aritmético.
+	t = deref(term, env)
+	k = t.KIND
+	if k != KIND_COMP and k != KIND_LIST:
+		return t
+	if k == KIND_COMP and t._ground:
+		return t
+	work: PyList[Tuple[Term, int]] = [(t, 0)]
+	vals: PyList[Term] = []
+	while work:
+		node, stage = work.pop()
+
+		if stage == 1:
+			# Hijos ya resueltos al final de vals, en orden de args/items
+			orig = node.args if node.KIND == KIND_COMP else node.items
+			n = len(orig)
+			rebuilt = vals[len(vals) - n:]
+			del vals[len(vals) - n:]
+			changed = False
+			for new, old in zip(rebuilt, orig):
+				if new is not old:
+					changed = True
+					break
+			if not changed:
+				vals.append(node)
+			elif node.KIND == KIND_COMP:
+				# El nodo reconstruido puede haber quedado ground tras aplicar
+				# los bindings: probe del pool inline (sin el frame extra de
+				# make_compound, que pesa a máxima profundidad de recursión).
+				c = Compound(node.functor, tuple(rebuilt))
+				if c._ground:
+					key = (c.functor, c.args)
+					cached = _compound_pool.get(key)
+					if cached is not None:
+						c = cached
+					else:
+						_compound_pool[key] = c
+				vals.append(c)
+			else:
+				vals.append(PList(rebuilt))
+			continue
+
+		node = deref(node, env)
+		nk = node.KIND
+		if nk == KIND_COMP and not node._ground:
+			work.append((node, 1))
+			for a in reversed(node.args):
+				work.append((a, 0))
+		elif nk == KIND_LIST:
+			work.append((node, 1))
+			for a in reversed(node.items):
+				work.append((a, 0))
+		else:
+			vals.append(node)
+	return vals[0]
 
@@ -8,20 +8,21 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass, field
+from itertools import count
 from typing import Dict, List as PyList, Set
 
-from core.types import Atom, Compound, Env, Number, Term, Variable, is_list, list_to_python
+from core.types import Atom, Compound, Env, Number, PList, Term, Variable, is_list, list_to_python
 
 
-# Contador global para nombres de variables frescas
-_var_counter = 0
+# Contador global para nombres de variables frescas: itertools.count es un
+# iterador en C, así que cada nombre cuesta una llamada en vez del par
+# LOAD_GLOBAL + STORE_GLOBAL del contador entero.
+_next_count = count(1).__next__
 
 
 def fresh_var_name(prefix: str = "_G") -> str:
     """Genera un nombre fresco para una variable."""
-    global _var_counter
-    _var_counter += 1
-    return f"{prefix}{_var_counter}"
+    return f"{prefix}{_next_count()}"
 
 
 def fresh_var(prefix: str = "_G") -> Variable:
@@ -46,9 +47,27 @@ def _get_precedence(term: Term) -> int:
     return 0  # Términos no-operadores tienen precedencia más alta (no necesitan paréntesis)
 
 
+# Caché de renders de subtérminos ground: los términos ground son inmutables
+# y su render solo depende del contexto (precedencia del padre, lado), así que
+# el mismo subtérmino compartido entre soluciones se formatea una sola vez.
+# La clave incluye id(term) y el valor retiene el término, lo que fija el id
+# mientras la entrada viva (sin retención, CPython podría reciclar el id).
+# max_depth forma parte de la clave para que un render truncado con "..." no
+# se sirva a una llamada con más profundidad disponible; solo se cachea desde
+# _PP_CACHE_DEPTH para no llenar el caché con fragmentos casi agotados.
+_PP_CACHE_DEPTH = 10
+_PP_CACHE_MAX = 4096
+_pp_cache: Dict[tuple, tuple] = {}
+
+
+def clear_pretty_cache() -> None:
+    """Vacía el caché de pretty-printing (entre consultas del REPL)."""
+    _pp_cache.clear()
+
+
 def _pretty_term_with_precedence(term: Term, env: Env, max_depth: int, parent_prec: int, is_right_child: bool = False) -> str:
     """Pretty-printer interno que considera precedencia del padre.
-    
+
     Args:
         term: Término a formatear
         env: Entorno para desreferenciar
@@ -58,90 +77,111 @@ def _pretty_term_with_precedence(term: Term, env: Env, max_depth: int, parent_pr
     """
     if max_depth <= 0:
         return "..."
-    
+
     if env:
         from solver.unify import deref
         term = deref(term, env)
-    
+
     if isinstance(term, Variable):
         return term.name
-    
+
     if isinstance(term, Atom):
         if term.name == "[]":
             return "[]"
         if _needs_quotes(term.name):
             return f"'{term.name}'"
         return term.name
-    
+
     if isinstance(term, Number):
         return str(term.value)
-    
+
+    if isinstance(term, PList):
+        elem_strs = [_pretty_term_with_precedence(e, env, max_depth-1, 9999, False) for e in term.items[:20]]
+        if len(term.items) > 20:
+            return f"[{', '.join(elem_strs)}, ...]"
+        return f"[{', '.join(elem_strs)}]"
+
     if isinstance(term, Compound):
-        # Casos especiales para listas
-        if is_list(term):
-            try:
-                elements = list_to_python(term)
-                if len(elements) > 20:
-                    shown = elements[:20]
-                    elem_strs = [_pretty_term_with_precedence(e, env, max_depth-1, 9999, False) for e in shown]
-                    return f"[{', '.join(elem_strs)}, ...]"
-                else:
-                    elem_strs = [_pretty_term_with_precedence(e, env, max_depth-1, 9999, False) for e in elements]
-                    return f"[{', '.join(elem_strs)}]"
-            except ValueError:
-                pass
+        if term._ground and max_depth >= _PP_CACHE_DEPTH:
+            key = (id(term), max_depth, parent_prec, is_right_child)
+            hit = _pp_cache.get(key)
+            if hit is not None:
+                return hit[1]
+            rendered = _pretty_compound(term, env, max_depth, parent_prec, is_right_child)
+            if len(_pp_cache) >= _PP_CACHE_MAX:
+                _pp_cache.clear()
+            _pp_cache[key] = (term, rendered)
+            return rendered
+        return _pretty_compound(term, env, max_depth, parent_prec, is_right_child)
+
+    return str(term)
+
+
+def _pretty_compound(term: Compound, env: Env, max_depth: int, parent_prec: int, is_right_child: bool) -> str:
+    """Render de un término compuesto (listas, operadores, functores)."""
+    # Casos especiales para listas
+    if is_list(term):
+        try:
+            elements = list_to_python(term)
+            if len(elements) > 20:
+                shown = elements[:20]
+                elem_strs = [_pretty_term_with_precedence(e, env, max_depth-1, 9999, False) for e in shown]
+                return f"[{', '.join(elem_strs)}, ...]"
+            else:
+                elem_strs = [_pretty_term_with_precedence(e, env, max_depth-1, 9999, False) for e in elements]
+                return f"[{', '.join(elem_strs)}]"
+        except ValueError:
+            pass
+    
+    if term.functor == "." and term.arity == 2:
+        head = _pretty_term_with_precedence(term.args[0], env, max_depth-1, 9999, False)
+        tail = _pretty_term_with_precedence(term.args[1], env, max_depth-1, 9999, False)
+        if tail == "[]":
+            return f"[{head}]"
+        return f"[{head}|{tail}]"
+    
+    # Operadores infijos binarios
+    if term.arity == 2 and term.functor in OPERATOR_PRECEDENCE:
+        my_prec = OPERATOR_PRECEDENCE[term.functor]
         
-        if term.functor == "." and term.arity() == 2:
-            head = _pretty_term_with_precedence(term.args[0], env, max_depth-1, 9999, False)
-            tail = _pretty_term_with_precedence(term.args[1], env, max_depth-1, 9999, False)
-            if tail == "[]":
-                return f"[{head}]"
-            return f"[{head}|{tail}]"
+        # Formatear hijo izquierdo
+        left_str = _pretty_term_with_precedence(term.args[0], env, max_depth-1, my_prec, False)
         
-        # Operadores infijos binarios
-        if term.arity() == 2 and term.functor in OPERATOR_PRECEDENCE:
-            my_prec = OPERATOR_PRECEDENCE[term.functor]
-            
-            # Formatear hijo izquierdo
-            left_str = _pretty_term_with_precedence(term.args[0], env, max_depth-1, my_prec, False)
-            
-            # Formatear hijo derecho
-            right_str = _pretty_term_with_precedence(term.args[1], env, max_depth-1, my_prec, True)
-            
-            result = f"{left_str} {term.functor} {right_str}"
-            
-            # Decidir si ESTE término necesita paréntesis
-            needs_parens = False
-            
-            if parent_prec < my_prec:
-                # Padre tiene mayor precedencia (número menor), necesitamos paréntesis
-                # Ejemplo: (a + b) * c -- la suma necesita paréntesis
-                needs_parens = True
-            elif parent_prec == my_prec and is_right_child:
-                # Mismo nivel y somos hijo derecho
-                # Para asociatividad izquierda (+,-,*,/), necesitamos paréntesis
-                # Ejemplo: a - (b - c) necesita paréntesis, pero a - b - c no
-                if term.functor != "^":
-                    needs_parens = True
-            
-            if needs_parens:
-                result = f"({result})"
-            
-            return result
+        # Formatear hijo derecho
+        right_str = _pretty_term_with_precedence(term.args[1], env, max_depth-1, my_prec, True)
+        
+        result = f"{left_str} {term.functor} {right_str}"
         
-        # Operador unario menos
-        if term.arity() == 1 and term.functor == "-":
-            operand = _pretty_term_with_precedence(term.args[0], env, max_depth-1, 0, False)
-            return f"-{operand}"
+        # Decidir si ESTE término necesita paréntesis
+        needs_parens = False
         
-        # Término compuesto estándar (funciones como ln, sen, exp, etc.)
-        if term.arity() == 0:
-            return term.functor
+        if parent_prec < my_prec:
+            # Padre tiene mayor precedencia (número menor), necesitamos paréntesis
+            # Ejemplo: (a + b) * c -- la suma necesita paréntesis
+            needs_parens = True
+        elif parent_prec == my_prec and is_right_child:
+            # Mismo nivel y somos hijo derecho
+            # Para asociatividad izquierda (+,-,*,/), necesitamos paréntesis
+            # Ejemplo: a - (b - c) necesita paréntesis, pero a - b - c no
+            if term.functor != "^":
+                needs_parens = True
+        
+        if needs_parens:
+            result = f"({result})"
         
-        args_str = ", ".join(_pretty_term_with_precedence(arg, env, max_depth-1, 9999, False) for arg in term.args)
-        return f"{term.functor}({args_str})"
+        return result
     
-    return str(term)
+    # Operador unario menos
+    if term.arity == 1 and term.functor == "-":
+        operand = _pretty_term_with_precedence(term.args[0], env, max_depth-1, 0, False)
+        return f"-{operand}"
+    
+    # Término compuesto estándar (funciones como ln, sen, exp, etc.)
+    if term.arity == 0:
+        return term.functor
+    
+    args_str = ", ".join(_pretty_term_with_precedence(arg, env, max_depth-1, 9999, False) for arg in term.args)
+    return f"{term.functor}({args_str})"
 
 
 def pretty_term(term: Term, env: Env = None, max_depth: int = 10) -> str:
@@ -155,22 +195,24 @@ def pretty_term(term: Term, env: Env = None, max_depth: int = 10) -> str:
     return _pretty_term_with_precedence(term, env, max_depth, parent_prec=9999, is_right_child=False)
 
 
+# Operadores especiales conocidos (constante de módulo: antes el set se
+# reconstruía en cada llamada a _needs_quotes)
+_SPECIAL_OPS = frozenset({":-", ";", ",", "=", "\\=", "==", "\\==", "<", "=<", ">", ">=",
+                          "is", "=:=", "=\\=", "+", "-", "*", "/", "//", "mod", "**"})
+
+
 def _needs_quotes(atom_name: str) -> bool:
     """Determina si un átomo necesita comillas."""
     if not atom_name:
         return True
-    
-    # Si empieza con minúscula y solo contiene alfanuméricos y _, no necesita comillas
-    if atom_name[0].islower() and all(c.isalnum() or c == '_' for c in atom_name):
-        return False
-    
-    # Operadores especiales conocidos
-    special_ops = {":-", ";", ",", "=", "\\=", "==", "\\==", "<", "=<", ">", ">=",
-                   "is", "=:=", "=\\=", "+", "-", "*", "/", "//", "mod", "**"}
-    if atom_name in special_ops:
+
+    # Si empieza con minúscula y es un identificador, no necesita comillas.
+    # str.isidentifier recorre el nombre en un solo pase en C, sin el
+    # generador de Python por carácter de la versión con all().
+    if atom_name[0].islower() and atom_name.isidentifier():
         return False
-    
-    return True
+
+    return atom_name not in _SPECIAL_OPS
 
 
 def format_error(error: Exception, context: str = "") -> str:
@@ -195,8 +237,8 @@ def format_solution(env: Env, query_vars: Set[Variable]) -> str:
     
     bindings = []
     for var in query_vars:
-        if var.id in env.bindings:
-            value = env.bindings[var.id]
+        value = env.get(var)
+        if value is not None:
             value_str = pretty_term(value, env)
             bindings.append(f"{var.name} = {value_str}")
     
@@ -206,7 +248,7 @@ def format_solution(env: Env, query_vars: Set[Variable]) -> str:
     return ", ".join(bindings)
 
 
-@dataclass
+@dataclass(slots=True)
 class Stopwatch:
     """Cronómetro simple para medir tiempos de ejecución."""
     
@@ -233,7 +275,7 @@ class Stopwatch:
         return self._elapsed
 
 
-@dataclass
+@dataclass(slots=True)
 class Statistics:
     """Contador de estadísticas de ejecución del motor."""
     
@@ -272,16 +314,38 @@ def rename_variables(term: Term, var_map: Dict[int, Variable] = None) -> Term:
     """
     if var_map is None:
         var_map = {}
-    
+
+    # Asignación en lote: las variables del término se conocen de antemano
+    # (extract_variables), así que el contador global avanza una vez por
+    # término y no una vez por variable; el sufijo posicional mantiene los
+    # nombres distinguibles dentro del lote (la identidad real es el id).
+    missing = [v for v in extract_variables(term) if v.id not in var_map]
+    if missing:
+        batch = _next_count()
+        for i, v in enumerate(missing):
+            var_map[v.id] = Variable(f"{v.name}{batch}_{i}")
+    return _rename_with_map(term, var_map)
+
+
+def _rename_with_map(term: Term, var_map: Dict[int, Variable]) -> Term:
+    """Sustituye variables según un var_map ya poblado."""
     if isinstance(term, Variable):
-        if term.id not in var_map:
-            var_map[term.id] = fresh_var(term.name)
-        return var_map[term.id]
+        return var_map.get(term.id, term)
     
     if isinstance(term, Compound):
-        new_args = tuple(rename_variables(arg, var_map) for arg in term.args)
+        # Subtérmino ground: no hay nada que renombrar, se comparte tal cual
+        if term._ground:
+            return term
+        # Constructor directo, sin pasar por make_compound: renombrar un
+        # término no-ground nunca produce uno ground (las variables solo
+        # cambian de identidad), así que el probe del pool no aplica y la
+        # llamada extra costaba un frame por nivel en plena recursión SLD.
+        new_args = tuple(_rename_with_map(arg, var_map) for arg in term.args)
         return Compound(term.functor, new_args)
-    
+
+    if isinstance(term, PList):
+        return PList(_rename_with_map(item, var_map) for item in term.items)
+
     # Átomos y números no cambian
     return term
 
@@ -295,12 +359,19 @@ def extract_variables(term: Term) -> Set[Variable]:
     Returns:
         Conjunto de todas las variables encontradas
     """
-    variables: Set[Variable] = set()
-    
-    if isinstance(term, Variable):
-        variables.add(term)
-    elif isinstance(term, Compound):
-        for arg in term.args:
-            variables.update(extract_variables(arg))
-    
-    return variables
+    # Recorrido iterativo con dedup por id: un solo hash por Variable
+    # encontrada, en vez de la unión de sets por nivel de la versión
+    # recursiva (que rehasheaba cada variable una vez por ancestro).
+    seen: Dict[int, Variable] = {}
+    stack: PyList[Term] = [term]
+    while stack:
+        t = stack.pop()
+        if isinstance(t, Variable):
+            seen.setdefault(t.id, t)
+        elif isinstance(t, Compound):
+            # Subtérmino ground: no contiene variables, nada que recorrer
+            if not t._ground:
+                stack.extend(t.args)
+        elif isinstance(t, PList):
+            stack.extend(t.items)
+    return set(seen.values())